@@ -1,17 +1,168 @@
+import numpy as np
+from scipy import sparse
 
-def build_feature_matrix(metrics, neighbors, errors):
-    X = {}
-    
-    for elem_id, m in metrics.items():
-        neighbor_count = len(neighbors.get(elem_id, []))
-        error_count = len(errors.get(elem_id, [])) if elem_id in errors else 0
-
-        X[elem_id] = [
-            m["area"],
-            m["aspect_ratio"],
-            m["edge_ratio"],
-            neighbor_count,
-            error_count
-        ]
+from core.element_table import ElementTable
+from core.mesh_neighbors import adjacency_matrix, neighbor_count_array
+from quality.metrics import metric_columns
+from quality.rules import error_count_array
+
+
+# Bump when features are added, removed or redefined; stored models
+# record the version they were trained with.
+FEATURE_SCHEMA_VERSION = 2
+
+FEATURE_NAMES = (
+    "area",
+    "aspect_ratio",
+    "edge_ratio",
+    "neighbor_count",
+    "error_count",
+    "neighbor_aspect_mean",
+    "neighbor_aspect_max",
+    "neighbor_area_ratio",
+    "ring_error_density",
+)
+
+# Rings of neighbors (including the direct ones) for ring_error_density
+ERROR_RING = 2
+
+
+class FeatureMatrix(ElementTable):
+    """
+    Features as an (E, F) float64 matrix `X`, row i for elem_ids[i], columns
+    named by `names`. As a dict it maps elem_id -> [feature values].
+    """
+
+    def __init__(self, elem_ids, X, names=FEATURE_NAMES):
+        super().__init__(elem_ids)
+        self.X = X
+        self.names = tuple(names)
+
+    def to_arrays(self):
+        return {"elem_ids": self.elem_ids, "X": self.X}, {"names": list(self.names)}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays["elem_ids"], arrays["X"], meta["names"])
+
+    def column(self, name):
+        return self.X[:, self.names.index(name)]
+
+    def _row(self, pos):
+        return self.X[pos].tolist()
+
+    def _rows(self):
+        return iter(self.X.tolist())
+
+
+def build_feature_matrix(metrics, neighbors, errors, ring=ERROR_RING):
+    elem_ids, columns = metric_columns(metrics)
+    X = feature_rows(
+        columns,
+        neighbor_count_array(neighbors, elem_ids),
+        error_count_array(errors, elem_ids),
+        adjacency_matrix(neighbors, elem_ids),
+        ring=ring,
+    )
+    return FeatureMatrix(elem_ids, X)
+
+
+def feature_rows(columns, neighbor_count, error_count, A, rows=None, ring=ERROR_RING):
+    """
+    Feature matrix for the element positions `rows` (default: all) from
+    whole-mesh metric columns, neighbor and error counts and the (E, E)
+    neighbor matrix A. Only the selected rows of A are multiplied.
+    """
+    if rows is None:
+        rows = slice(None)
+
+    nbr = neighborhood_features(
+        A, columns["aspect_ratio"], element_size(columns), error_count > 0, ring, rows
+    )
+
+    X = np.column_stack([
+        columns["area"][rows],
+        columns["aspect_ratio"][rows],
+        columns["edge_ratio"][rows],
+        neighbor_count[rows],
+        error_count[rows],
+        nbr["neighbor_aspect_mean"],
+        nbr["neighbor_aspect_max"],
+        nbr["neighbor_area_ratio"],
+        nbr["ring_error_density"],
+    ]).astype(np.float64)
+
+    # Metrics that do not apply to an element type (area of a solid) are NaN
+    np.nan_to_num(X, copy=False, nan=0.0)
 
     return X
+
+
+def element_size(columns):
+    """Area for shells, volume for solids (where area is NaN)."""
+    area = columns["area"]
+    if "volume" not in columns:
+        return area
+    return np.where(np.isnan(area), columns["volume"], area)
+
+
+def neighborhood_features(A, aspect, size, has_error, ring=ERROR_RING, rows=None):
+    """
+    Gradient features over the (E, E) neighbor matrix A, for the element
+    positions `rows` (default: all), using sparse products only:
+        neighbor_aspect_mean/max  aspect ratio of the direct neighbors
+        neighbor_area_ratio       own size / mean neighbor size
+        ring_error_density        share of elements within `ring` rings
+                                  (excluding itself) that have errors
+    Elements without neighbors get 0 aspect, ratio 1 and density 0.
+    """
+    aspect = np.nan_to_num(np.asarray(aspect, dtype=np.float64), nan=0.0)
+    size = np.nan_to_num(np.asarray(size, dtype=np.float64), nan=0.0)
+    has_error = np.asarray(has_error, dtype=np.float64)
+
+    if rows is None:
+        rows = slice(None)
+    A = sparse.csr_matrix(A)
+    A_rows = A[rows]
+    own_size, own_error = size[rows], has_error[rows]
+
+    count = np.asarray(A_rows.sum(axis=1)).ravel()
+    has_nbrs = count > 0
+    safe = np.maximum(count, 1)
+
+    aspect_mean = (A_rows @ aspect) / safe
+    aspect_max = np.asarray(A_rows.multiply(aspect).max(axis=1).todense()).ravel()
+
+    size_mean = (A_rows @ size) / safe
+    area_ratio = np.divide(
+        own_size, size_mean, out=np.ones_like(own_size), where=has_nbrs & (size_mean > 0)
+    )
+
+    # Reachability within `ring` steps: boolean powers of (A + I)
+    step = (A + sparse.identity(A.shape[0], format="csr")).tocsr()
+    reach = step[rows]
+    for _ in range(ring - 1):
+        reach = reach @ step
+        reach.data[:] = 1.0
+    reach_count = np.asarray(reach.sum(axis=1)).ravel() - 1
+    density = np.divide(
+        reach @ has_error - own_error, reach_count,
+        out=np.zeros_like(own_error), where=reach_count > 0
+    )
+
+    return {
+        "neighbor_aspect_mean": aspect_mean,
+        "neighbor_aspect_max": aspect_max,
+        "neighbor_area_ratio": area_ratio,
+        "ring_error_density": density,
+    }
+
+
+def as_feature_matrix(features):
+    """Accepts a FeatureMatrix or the legacy elem_id -> [values] dict."""
+    if isinstance(features, FeatureMatrix):
+        return features
+
+    elem_ids = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+    X = np.array(list(features.values()), dtype=np.float64).reshape(len(elem_ids), -1)
+    return FeatureMatrix(elem_ids, X, FEATURE_NAMES[:X.shape[1]])
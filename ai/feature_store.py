@@ -0,0 +1,131 @@
+import json
+import os
+
+import numpy as np
+
+from ai.feature_builder import FEATURE_NAMES, FEATURE_SCHEMA_VERSION
+
+
+DEFAULT_STORE_DIR = "feature_store"
+MANIFEST = "manifest.json"
+
+# ----------------------------------------------------------------
+# Layout
+#   <root>/manifest.json        schema, row count, per-mesh row ranges
+#   <root>/<column>.bin         one raw little-endian array per column
+#
+# Appends write to the end of every column file and then rewrite the
+# manifest; the manifest row count is authoritative, so bytes past it
+# (an interrupted append) are truncated before the next write. Reads
+# are np.memmap views, so the store can be far larger than RAM.
+# ----------------------------------------------------------------
+
+META_COLUMNS = {
+    "elem_id": "<i8",
+    "mesh": "<i4",
+    "label": "<i1",
+}
+
+
+class FeatureStore:
+
+    def __init__(self, root=DEFAULT_STORE_DIR, feature_names=FEATURE_NAMES):
+        self.root = root
+        path = os.path.join(root, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+            if self.manifest["feature_names"] != list(feature_names):
+                raise ValueError(
+                    f"{root} holds features {self.manifest['feature_names']}, "
+                    f"expected {list(feature_names)}; use a new store directory"
+                )
+        else:
+            columns = {name: "<f8" for name in feature_names}
+            columns.update(META_COLUMNS)
+            self.manifest = {
+                "feature_schema_version": FEATURE_SCHEMA_VERSION,
+                "feature_names": list(feature_names),
+                "columns": columns,
+                "rows": 0,
+                "meshes": [],
+            }
+
+    @property
+    def feature_names(self):
+        return tuple(self.manifest["feature_names"])
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    def has_source(self, key):
+        return any(m["key"] == key for m in self.manifest["meshes"])
+
+    def append(self, features, labels, key, source=None):
+        """
+        Appends one mesh: a FeatureMatrix and its (E,) 0/1 labels. `key`
+        identifies the mesh (e.g. a content hash); a key already in the
+        store is skipped. Returns False when skipped.
+        """
+        if self.has_source(key):
+            return False
+        if tuple(features.names) != self.feature_names:
+            raise ValueError(f"Feature names {features.names} do not match the store")
+
+        os.makedirs(self.root, exist_ok=True)
+        start = len(self)
+        n = len(features.elem_ids)
+        mesh_index = len(self.manifest["meshes"])
+
+        data = {name: features.X[:, i] for i, name in enumerate(self.feature_names)}
+        data["elem_id"] = features.elem_ids
+        data["mesh"] = np.full(n, mesh_index)
+        data["label"] = labels
+
+        for name, dtype in self.manifest["columns"].items():
+            arr = np.ascontiguousarray(data[name], dtype=dtype)
+            with open(self._column_path(name), "ab") as f:
+                f.truncate(start * arr.itemsize)
+                f.write(arr.tobytes())
+
+        self.manifest["rows"] = start + n
+        self.manifest["meshes"].append({
+            "key": key, "source": source or {}, "start": start, "stop": start + n,
+        })
+        self._write_manifest()
+        return True
+
+    def column(self, name):
+        """Read-only memmap of one column (empty array for an empty store)."""
+        dtype = np.dtype(self.manifest["columns"][name])
+        if len(self) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self._column_path(name), dtype=dtype, mode="r",
+                         shape=(len(self),))
+
+    def batches(self, batch_size, shuffle=True, seed=0):
+        """
+        Yields (X, y) over the whole store, `batch_size` rows at a time.
+        Each batch is a contiguous row range (sequential reads); with
+        `shuffle` the order of the ranges is randomized.
+        """
+        columns = [self.column(name) for name in self.feature_names]
+        labels = self.column("label")
+
+        starts = np.arange(0, len(self), batch_size)
+        if shuffle:
+            np.random.default_rng(seed).shuffle(starts)
+
+        for start in starts.tolist():
+            stop = start + batch_size
+            X = np.column_stack([c[start:stop] for c in columns])
+            yield X, np.asarray(labels[start:stop], dtype=np.int64)
+
+    def _column_path(self, name):
+        return os.path.join(self.root, f"{name}.bin")
+
+    def _write_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
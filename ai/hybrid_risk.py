@@ -1,25 +1,70 @@
-from ai.risk_model import risk_category
+import numpy as np
 
+from ai.feature_builder import as_feature_matrix
+from ai.risk_model import RISK_CUTOFFS, categorize, risk_category, rule_risk_array
+from core.element_table import ElementValues, aligned_values
 
-def compute_hybrid_risk(rule_risks, ml_probs):
-    hybrid = {}
 
-    for elem_id in rule_risks:
-        rule_score = rule_risks.get(elem_id, 0.0)
-        ml_score = ml_probs.get(elem_id, 0.0)
+RULE_WEIGHT = 0.6
+ML_WEIGHT = 0.4
 
-        final_score = 0.6 * rule_score + 0.4 * ml_score
-        final_score = min(final_score, 1.0)
+# HIGH at or above the first cut-off, MEDIUM at or above the second
+HYBRID_CUTOFFS = (0.65, 0.35)
 
-        hybrid[elem_id] = final_score
 
-    return hybrid
+def compute_hybrid_risk(rule_risks, ml_probs, rule_weight=RULE_WEIGHT,
+                        ml_weight=ML_WEIGHT):
+    """
+    Weighted blend of rule risk and ML failure probability, clamped to 1.
+    Inputs may be ElementValues or elem_id -> score dicts; elements missing
+    from ml_probs count as 0.
+    """
+    if isinstance(rule_risks, ElementValues):
+        elem_ids, rule = rule_risks.elem_ids, rule_risks.array
+    else:
+        elem_ids = np.fromiter(rule_risks.keys(), dtype=np.int64, count=len(rule_risks))
+        rule = np.fromiter(rule_risks.values(), dtype=np.float64, count=len(rule_risks))
+
+    ml = aligned_values(ml_probs, elem_ids)
+    return ElementValues(elem_ids, hybrid_risk_array(rule, ml, rule_weight, ml_weight))
+
 
+def hybrid_risk_array(rule, ml, rule_weight=RULE_WEIGHT, ml_weight=ML_WEIGHT):
+    return np.minimum(rule_weight * rule + ml_weight * ml, 1.0)
 
-def hybrid_category(score):
-    if score >= 0.65:
+
+def hybrid_category(score, cutoffs=HYBRID_CUTOFFS):
+    if score >= cutoffs[0]:
         return "HIGH"
-    elif score >= 0.35:
+    elif score >= cutoffs[1]:
         return "MEDIUM"
     else:
         return "LOW"
+
+
+def hybrid_categories(scores, cutoffs=HYBRID_CUTOFFS):
+    """Vectorized hybrid_category: array of "HIGH" / "MEDIUM" / "LOW"."""
+    return categorize(scores, cutoffs)
+
+
+def score_elements(features, ml_probs, weights=None, rule_weight=RULE_WEIGHT,
+                   ml_weight=ML_WEIGHT, risk_cutoffs=RISK_CUTOFFS,
+                   hybrid_cutoffs=HYBRID_CUTOFFS):
+    """
+    Rule risk, hybrid risk and both category arrays in one pass over the
+    feature matrix. `ml_probs` is an array aligned with the features or an
+    elem_id -> probability mapping.
+    """
+    features = as_feature_matrix(features)
+    rule = rule_risk_array(features, weights)
+    hybrid = hybrid_risk_array(
+        rule, aligned_values(ml_probs, features.elem_ids), rule_weight, ml_weight
+    )
+
+    return {
+        "elem_ids": features.elem_ids,
+        "rule_risk": rule,
+        "rule_category": categorize(rule, risk_cutoffs),
+        "hybrid_risk": hybrid,
+        "hybrid_category": categorize(hybrid, hybrid_cutoffs),
+    }
@@ -0,0 +1,125 @@
+import json
+import os
+import time
+
+import joblib
+import sklearn
+
+from ai.feature_builder import FEATURE_NAMES, FEATURE_SCHEMA_VERSION
+
+
+DEFAULT_MODEL_DIR = "models"
+
+
+class ModelStore:
+    """
+    Versioned on-disk store of trained models:
+
+        <root>/<name>/v<N>/model.joblib
+        <root>/<name>/v<N>/meta.json
+
+    meta.json records the feature schema the model expects plus training
+    metadata; loads only consider versions whose schema matches the
+    current feature builder.
+    """
+
+    def __init__(self, root=DEFAULT_MODEL_DIR):
+        self.root = root
+
+    def versions(self, name):
+        path = os.path.join(self.root, name)
+        if not os.path.isdir(path):
+            return []
+        return sorted(
+            int(d[1:]) for d in os.listdir(path)
+            if d.startswith("v") and d[1:].isdigit()
+        )
+
+    def save(self, model, name="rf", metadata=None):
+        version = max(self.versions(name), default=0) + 1
+        path = os.path.join(self.root, name, f"v{version}")
+        os.makedirs(path)
+
+        # Uncompressed so numpy arrays inside the model can be memory-mapped
+        joblib.dump(model, self.model_path(name, version))
+
+        meta = {
+            "name": name,
+            "version": version,
+            "feature_schema_version": FEATURE_SCHEMA_VERSION,
+            "feature_names": list(FEATURE_NAMES),
+            "model_class": type(model).__name__,
+            "sklearn_version": sklearn.__version__,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "training": metadata or {},
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        return version
+
+    def model_path(self, name, version):
+        return os.path.join(self.root, name, f"v{version}", "model.joblib")
+
+    def metadata(self, name, version):
+        with open(os.path.join(self.root, name, f"v{version}", "meta.json")) as f:
+            return json.load(f)
+
+    def latest_compatible(self, name="rf"):
+        """Newest version trained on the current feature schema, or None."""
+        for version in reversed(self.versions(name)):
+            if is_compatible(self.metadata(name, version)):
+                return version
+        return None
+
+    def load(self, name="rf", version=None, mmap=True):
+        """
+        Loads a model (default: latest compatible). With mmap=True the
+        model's arrays are memory-mapped read-only instead of copied in.
+        """
+        version = version or self.latest_compatible(name)
+        if version is None:
+            raise FileNotFoundError(
+                f"No '{name}' model for feature schema v{FEATURE_SCHEMA_VERSION} "
+                f"in {self.root}"
+            )
+
+        meta = self.metadata(name, version)
+        if not is_compatible(meta):
+            raise ValueError(
+                f"Model {name} v{version} expects features {meta['feature_names']}"
+            )
+
+        return joblib.load(self.model_path(name, version), mmap_mode="r" if mmap else None)
+
+    def lazy(self, name="rf", version=None, mmap=True):
+        """A LazyModel for the selected version, or None if there is none."""
+        version = version or self.latest_compatible(name)
+        if version is None:
+            return None
+        return LazyModel(self, name, version, mmap)
+
+
+class LazyModel:
+    """Stands in for a stored model and loads it on first use."""
+
+    def __init__(self, store, name, version, mmap=True):
+        self.store = store
+        self.name = name
+        self.version = version
+        self.mmap = mmap
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self.store.load(self.name, self.version, self.mmap)
+        return self._model
+
+    def __getattr__(self, attr):
+        return getattr(self.model, attr)
+
+
+def is_compatible(meta):
+    return (meta.get("feature_schema_version") == FEATURE_SCHEMA_VERSION
+            and meta.get("feature_names") == list(FEATURE_NAMES))
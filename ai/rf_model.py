@@ -1,20 +1,47 @@
+import os
+
 import numpy as np
+from joblib import Parallel, delayed
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 
+from ai.feature_builder import as_feature_matrix
+from ai.sampling import SAMPLE_SEED, TRAIN_SAMPLE_CAP, stratified_sample
+from core.element_table import ElementValues
+
 
-def train_rf_model(feature_dict, errors):
-    X = []
-    y = []
+PREDICT_CHUNK = 65_536
+STREAM_BATCH = 250_000
 
-    for elem_id, features in feature_dict.items():
-        X.append(features)
-        y.append(1 if elem_id in errors else 0)
 
-    X = np.array(X)
-    y = np.array(y)
+def error_labels(features, errors):
+    """1 for elements with at least one rule violation, aligned with features."""
+    if hasattr(errors, "mask") and np.array_equal(errors.elem_ids, features.elem_ids):
+        return (errors.mask != 0).astype(np.int64)
+    return np.array(
+        [1 if eid in errors else 0 for eid in features.elem_ids.tolist()],
+        dtype=np.int64
+    )
 
+
+def train_rf_model(feature_dict, errors, max_samples=TRAIN_SAMPLE_CAP,
+                   seed=SAMPLE_SEED):
+    """
+    Fits the RF on at most `max_samples` elements, drawn stratified by
+    error label. The sampling record (seed, rows seen/sampled per label) is
+    kept on the model as `training_sample_`.
+    """
+    features = as_feature_matrix(feature_dict)
+    X, y, info = stratified_sample(
+        features.X, error_labels(features, errors), max_samples, seed
+    )
+    model = fit_rf_model(X, y)
+    model.training_sample_ = info
+    return model
+
+
+def fit_rf_model(X, y, n_jobs=-1):
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.25, random_state=42
     )
@@ -22,7 +49,8 @@ def train_rf_model(feature_dict, errors):
     model = RandomForestClassifier(
         n_estimators=100,
         max_depth=5,
-        random_state=42
+        random_state=42,
+        n_jobs=n_jobs
     )
 
     model.fit(X_train, y_train)
@@ -35,12 +63,149 @@ def train_rf_model(feature_dict, errors):
     return model
 
 
-def predict_failure_probability(model, feature_dict):
-    probabilities = {}
+def train_rf_streaming(store, batch_size=STREAM_BATCH, n_estimators=100,
+                       seed=SAMPLE_SEED, n_jobs=-1):
+    """
+    Warm-start RF over a FeatureStore, one batch in memory at a time: each
+    batch grows the forest by its share of `n_estimators` trees, fitted on
+    that batch only (the first n_estimators % batches batches get one
+    extra). Every batch gets at least one tree, so with more batches than
+    `n_estimators` the forest grows to one tree per batch. Batches holding
+    a single label are merged into the next one; a single-label remainder
+    at the end is merged into the last fitted batch.
+    """
+    n_batches = max(1, -(-len(store) // batch_size))
+    if n_estimators < n_batches:
+        print(f"Growing the forest from {n_estimators} to {n_batches} trees, "
+              f"one per batch of {batch_size} rows")
+        n_estimators = n_batches
+    base, extra = divmod(n_estimators, n_batches)
+
+    model = RandomForestClassifier(
+        n_estimators=0,
+        max_depth=5,
+        random_state=seed,
+        n_jobs=n_jobs,
+        warm_start=True
+    )
+
+    pending = None
+    owed = 0
+    last = None
+    used = 0
+    for i, (X, y) in enumerate(store.batches(batch_size, seed=seed)):
+        owed += base + (i < extra)
+        if pending is not None:
+            X, y = np.concatenate([pending[0], X]), np.concatenate([pending[1], y])
+            pending = None
+        if len(y) == 0 or y.min() == y.max():
+            pending = (X, y)
+            continue
+        last = (X, y)
+
+        model.n_estimators += owed
+        model.fit(X, y)
+        used += len(y)
+        owed = 0
+
+    if owed and last is not None:
+        if pending is not None:
+            used += len(pending[1])
+            last = np.concatenate([last[0], pending[0]]), np.concatenate([last[1], pending[1]])
+        model.n_estimators += owed
+        model.fit(*last)
+
+    if model.n_estimators == 0:
+        raise ValueError("Feature store needs elements with and without errors")
+
+    print(f"Trained {model.n_estimators} trees on {used} of {len(store)} stored elements")
+    return model
+
+
+def predict_failure_probability(model, feature_dict, chunk_size=PREDICT_CHUNK,
+                                n_jobs=None):
+    """
+    P(failure) for every element in one batched pass. Rows are split into
+    chunks of `chunk_size` to bound memory and chunks run on `n_jobs`
+    threads (default: all cores). `model` may be a fitted classifier or a
+    CompiledForest. Returns ElementValues (dict view: elem_id -> probability).
+    """
+    features = as_feature_matrix(feature_dict)
+    X = features.X
+
+    positive = _positive_column(model)
+    if positive is None:
+        return ElementValues(features.elem_ids, np.zeros(len(X)))
+
+    chunks = [X[i:i + chunk_size] for i in range(0, len(X), chunk_size)]
+    if n_jobs is None:
+        n_jobs = min(len(chunks), os.cpu_count() or 1)
+
+    parts = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(model.predict_proba)(chunk) for chunk in chunks
+    )
+    probs = np.concatenate([p[:, positive] for p in parts]) if parts else np.zeros(0)
+    return ElementValues(features.elem_ids, probs)
+
+
+def _positive_column(model):
+    classes = list(model.classes_)
+    return classes.index(1) if 1 in classes else None
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into contiguous node arrays
+    (feature, threshold, children, leaf class fractions) across all
+    trees. Prediction walks every tree for every sample at once, one tree
+    level per step, instead of calling into each estimator separately.
+    """
+
+    def __init__(self, model):
+        self.classes_ = model.classes_
+        trees = [est.tree_ for est in model.estimators_]
+
+        sizes = np.array([t.node_count for t in trees])
+        offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+        self.roots = offsets.astype(np.int64)
+
+        self.feature = np.concatenate([t.feature for t in trees]).astype(np.int64)
+        self.threshold = np.concatenate([t.threshold for t in trees])
+
+        # children[2 * node + go_right]; leaves loop onto themselves so every
+        # walk can take max_depth steps
+        left = np.concatenate([t.children_left for t in trees])
+        right = np.concatenate([t.children_right for t in trees])
+        base = np.repeat(offsets, sizes)
+        leaf = left < 0
+        idx = np.arange(len(left))
+        self.children = np.stack([
+            np.where(leaf, idx, left + base),
+            np.where(leaf, idx, right + base),
+        ], axis=1).ravel().astype(np.int64)
+        self.feature[leaf] = 0
+
+        value = np.concatenate([t.value[:, 0, :] for t in trees])
+        total = value.sum(axis=1, keepdims=True)
+        self.value = np.divide(value, total, out=np.zeros_like(value), where=total > 0)
+
+        self.max_depth = max(t.max_depth for t in trees)
+
+    def predict_proba(self, X):
+        # Trees split on float32 features; compare the same way
+        X = np.asarray(X, dtype=np.float32)
+        n = len(X)
+        columns = np.ascontiguousarray(X.T).ravel()     # feature-major
+        rows = np.arange(n, dtype=np.int64)
+        node = np.repeat(self.roots, n).reshape(-1, n)   # (trees, n)
+
+        for _ in range(self.max_depth):
+            x = columns.take(self.feature.take(node) * n + rows)
+            go_right = x > self.threshold.take(node)
+            node = self.children.take(2 * node + go_right)
 
-    for elem_id, features in feature_dict.items():
-        prob = model.predict_proba([features])[0][1]
-        probabilities[elem_id] = prob
+        return self.value.take(node, axis=0).mean(axis=0)
 
-    return probabilities
 
+def compile_forest(model):
+    return CompiledForest(model)
@@ -1,44 +1,77 @@
 # ai/risk_model.py
 
-def compute_risk_scores(features):
-    risks = {}
+import numpy as np
 
-    for elem_id, f in features.items():
-        area, aspect, edge, neighbors, errors = f
+from ai.feature_builder import as_feature_matrix
+from core.element_table import ElementValues
 
-        risk = 0.0
 
-        # Aspect ratio contribution
-        if aspect > 3:
-            risk += 0.4
-        elif aspect > 2:
-            risk += 0.2
+# Threshold ladders are (threshold, weight) pairs checked from the top;
+# the first threshold exceeded contributes its weight.
+DEFAULT_RISK_WEIGHTS = {
+    "aspect_ratio": [(3.0, 0.4), (2.0, 0.2)],     # Aspect ratio contribution
+    "edge_ratio": [(3.0, 0.3), (2.0, 0.15)],      # Edge transition contribution
+    "min_neighbors": 2,                           # Connectivity contribution
+    "missing_neighbor": 0.2,
+    "per_error": 0.1,                             # Error count contribution
+    "max_error": 0.3,
+}
 
-        # Edge transition contribution
-        if edge > 3:
-            risk += 0.3
-        elif edge > 2:
-            risk += 0.15
+# HIGH at or above the first cut-off, MEDIUM at or above the second
+RISK_CUTOFFS = (0.6, 0.3)
 
-        # Connectivity contribution
-        if neighbors < 2:
-            risk += 0.2
+CATEGORIES = ("HIGH", "MEDIUM", "LOW")
 
-        # Error count contribution
-        risk += min(errors * 0.1, 0.3)
 
-        # Clamp to [0, 1]
-        risk = min(risk, 1.0)
+def compute_risk_scores(features, weights=None):
+    """
+    Rule-based risk for every element from the feature matrix, in whole
+    columns. Returns ElementValues (dict view: elem_id -> score).
+    """
+    features = as_feature_matrix(features)
+    return ElementValues(features.elem_ids, rule_risk_array(features, weights))
 
-        risks[elem_id] = risk
 
-    return risks
+def rule_risk_array(features, weights=None):
+    w = dict(DEFAULT_RISK_WEIGHTS, **(weights or {}))
 
+    risk = (
+        _ladder(features.column("aspect_ratio"), w["aspect_ratio"])
+        + _ladder(features.column("edge_ratio"), w["edge_ratio"])
+        + np.where(features.column("neighbor_count") < w["min_neighbors"],
+                   w["missing_neighbor"], 0.0)
+        + np.minimum(features.column("error_count") * w["per_error"], w["max_error"])
+    )
 
-def risk_category(score):
-    if score >= 0.6:
+    # Clamp to [0, 1]
+    return np.minimum(risk, 1.0)
+
+
+def _ladder(values, steps):
+    return np.select(
+        [values > threshold for threshold, _ in steps],
+        [weight for _, weight in steps],
+        default=0.0
+    )
+
+
+def risk_category(score, cutoffs=RISK_CUTOFFS):
+    if score >= cutoffs[0]:
         return "HIGH"
-    elif score >= 0.3:
+    elif score >= cutoffs[1]:
         return "MEDIUM"
     else:
         return "LOW"
+
+
+def risk_categories(scores, cutoffs=RISK_CUTOFFS):
+    """Vectorized risk_category: array of "HIGH" / "MEDIUM" / "LOW"."""
+    return categorize(scores, cutoffs)
+
+
+def categorize(scores, cutoffs):
+    scores = np.asarray(scores)
+    return np.select(
+        [scores >= cutoffs[0], scores >= cutoffs[1]], list(CATEGORIES[:2]),
+        default=CATEGORIES[2]
+    )
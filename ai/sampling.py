@@ -0,0 +1,90 @@
+import numpy as np
+
+
+TRAIN_SAMPLE_CAP = 250_000
+SAMPLE_SEED = 42
+
+
+class StratifiedReservoir:
+    """
+    Bounded uniform sample of (X, y) rows fed in chunks, stratified by
+    label. Every row gets a random key and each stratum keeps the rows with
+    the `capacity` smallest keys (a bottom-k reservoir), so memory stays at
+    most capacity rows per label however many rows stream past.
+
+    `sample()` then splits `capacity` across labels in proportion to the
+    rows seen, taking the smallest keys of each stratum.
+    """
+
+    def __init__(self, capacity=TRAIN_SAMPLE_CAP, seed=SAMPLE_SEED):
+        self.capacity = int(capacity)
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.strata = {}    # label -> (keys, X)
+        self.seen = {}      # label -> rows offered
+
+    def add(self, X, y):
+        X = np.asarray(X)
+        y = np.asarray(y, dtype=np.int64)
+        keys = self.rng.random(len(y))
+
+        for label in np.flatnonzero(np.bincount(y)).tolist():
+            sel = y == label
+            k, x = keys[sel], X[sel]
+            self.seen[label] = self.seen.get(label, 0) + len(k)
+
+            if label in self.strata:
+                old_k, old_x = self.strata[label]
+                k, x = np.concatenate([old_k, k]), np.concatenate([old_x, x])
+            if len(k) > self.capacity:
+                keep = np.argpartition(k, self.capacity - 1)[:self.capacity]
+                k, x = k[keep], x[keep]
+            self.strata[label] = (k, x)
+
+    def allocation(self):
+        """Rows drawn per label: proportional to rows seen, at least one each."""
+        total = sum(self.seen.values())
+        if total <= self.capacity:
+            return dict(self.seen)
+        return {
+            label: min(len(self.strata[label][0]),
+                       max(1, self.capacity * count // total))
+            for label, count in self.seen.items()
+        }
+
+    def sample(self):
+        """(X, y) of the sampled rows, in random (key) order."""
+        keys, X, y = [], [], []
+        for label, n in sorted(self.allocation().items()):
+            k, x = self.strata[label]
+            pick = np.argsort(k, kind="stable")[:n]
+            keys.append(k[pick])
+            X.append(x[pick])
+            y.append(np.full(n, label, dtype=np.int64))
+
+        if not keys:
+            return np.zeros((0, 0)), np.zeros(0, dtype=np.int64)
+
+        order = np.argsort(np.concatenate(keys), kind="stable")
+        return np.concatenate(X)[order], np.concatenate(y)[order]
+
+    def info(self):
+        """Sampling record for model metadata."""
+        return {
+            "capacity": self.capacity,
+            "seed": self.seed,
+            "seen": {str(k): v for k, v in sorted(self.seen.items())},
+            "sampled": {str(k): v for k, v in sorted(self.allocation().items())},
+        }
+
+
+def stratified_sample(X, y, capacity=TRAIN_SAMPLE_CAP, seed=SAMPLE_SEED):
+    """
+    One-shot StratifiedReservoir over in-memory arrays; returns (X, y, info).
+    Inputs within the cap are returned as they are.
+    """
+    reservoir = StratifiedReservoir(capacity, seed)
+    reservoir.add(X, y)
+    if len(y) <= reservoir.capacity:
+        return X, y, reservoir.info()
+    return (*reservoir.sample(), reservoir.info())
@@ -1,4 +1,9 @@
-from ai.risk_model import risk_category
+import numpy as np
+
+from ai.risk_model import risk_categories, risk_category
+from core.element_table import aligned_values
+from core.spatial_index import box_overlap, spatial_index
+from quality.metrics import metric_columns
 
 
 def mesh_summary(metrics, errors, risks):
@@ -32,3 +37,194 @@ def compare_summaries(first, final):
             comparison[key] = final[key] - first[key]
 
     return comparison
+
+
+# ----------------------------------------------------------------
+# Spatial correspondence: final-mesh elements -> first-mesh elements
+# ----------------------------------------------------------------
+
+MATCH_CANDIDATES = 8
+MIN_OVERLAP = 0.5
+# Boxes are padded by this fraction of their largest extent before
+# overlapping, so thin axes (nearly flat shells) don't dominate the score
+BOX_PADDING = 0.1
+REGION_CELLS = 8
+
+
+def match_elements(first_mesh, final_mesh, k=MATCH_CANDIDATES, min_overlap=MIN_OVERLAP):
+    """
+    Maps every final-mesh element to the first-mesh element it most
+    overlaps. Candidates come from the first mesh's spatial index:
+    the nearest centroid is tried first and only elements whose box
+    overlap with it is below `min_overlap` are re-queried with the `k`
+    nearest, picking the best overlap discounted by centroid distance
+    (so equal boxes, e.g. the two triangles of a split quad, resolve to
+    the closer one). Returns (first_pos, score): first_pos is -1 where no
+    candidate overlaps at all.
+    """
+    first_index, final_index = spatial_index(first_mesh), spatial_index(final_mesh)
+    c_first, c_final = first_index.centroids, final_index.centroids
+    lo_first, hi_first = _padded(first_index.lower, first_index.upper)
+    lo_final, hi_final = _padded(final_index.lower, final_index.upper)
+
+    first_pos = np.full(len(c_final), -1, dtype=np.int64)
+    score = np.zeros(len(c_final))
+    if len(c_first) == 0 or len(c_final) == 0:
+        return first_pos, score
+
+    _, first_pos = first_index.nearest_elements(c_final)
+    score = box_overlap(lo_final, hi_final, lo_first[first_pos], hi_first[first_pos])
+
+    retry = np.flatnonzero(score < min_overlap)
+    k = min(k, len(c_first))
+    if len(retry) and k > 1:
+        dist, cand = first_index.nearest_elements(c_final[retry], k)
+        s = box_overlap(
+            lo_final[retry, None], hi_final[retry, None], lo_first[cand], hi_first[cand]
+        )
+        radius = 0.5 * np.linalg.norm(hi_final[retry] - lo_final[retry], axis=1)
+        best = (s / (1.0 + dist / np.maximum(radius, 1e-12)[:, None])).argmax(axis=1)
+        rows = np.arange(len(retry))
+        first_pos[retry] = cand[rows, best]
+        score[retry] = s[rows, best]
+
+    first_pos[score <= 0] = -1
+    return first_pos, score
+
+
+def _padded(lo, hi, fraction=BOX_PADDING):
+    pad = fraction * (hi - lo).max(axis=1, keepdims=True)
+    return lo - pad, hi + pad
+
+
+def region_grid(points, cells=REGION_CELLS, bounds=None):
+    """
+    Uniform grid of cubic cells, `cells` along the longest axis of
+    `bounds` (default: the points' box). Returns (region id per point,
+    grid origin, cell size, cells per axis).
+    """
+    lo, hi = bounds if bounds is not None else (points.min(axis=0), points.max(axis=0))
+    size = max(float((hi - lo).max()) / cells, 1e-12)
+    shape = np.maximum(np.ceil((hi - lo) / size).astype(np.int64), 1)
+    ijk = np.clip(((points - lo) / size).astype(np.int64), 0, shape - 1)
+    return np.ravel_multi_index(ijk.T, shape), lo, size, shape
+
+
+def region_deltas(first, final, cells=REGION_CELLS, first_pos=None):
+    """
+    Per-region quality and risk change between two analyzed meshes, each a
+    dict with "mesh", "metrics", "errors" and "risks" (or a MeshAnalysis,
+    whose hybrid risks are used). Regions are uniform grid cells over both
+    meshes' centroids; every final-mesh element is counted in the
+    region of the first-mesh element it matches (see match_elements, or
+    pass `first_pos`), unmatched ones by their own centroid. Besides the
+    per-region totals of both meshes, "matched" counts the matched final
+    elements and "matched_delta_risk" / "matched_delta_aspect_ratio"
+    average their element-to-element changes (NaN without matches).
+    Returns a dict of aligned arrays.
+    """
+    first, final = _analysis_parts(first), _analysis_parts(final)
+    if first_pos is None:
+        first_pos, _ = match_elements(first["mesh"], final["mesh"])
+    c_first = spatial_index(first["mesh"]).centroids
+    c_final = spatial_index(final["mesh"]).centroids
+
+    points = np.concatenate([c_first, c_final])
+    bounds = (points.min(axis=0), points.max(axis=0)) if len(points) else (np.zeros(3), np.ones(3))
+    r_first, origin, size, shape = region_grid(c_first, cells, bounds)
+    r_final = region_grid(c_final, cells, bounds)[0]
+    matched = first_pos >= 0
+    r_final[matched] = r_first[first_pos[matched]]
+
+    num_regions = int(shape.prod())
+    regions = np.flatnonzero(
+        np.bincount(r_first, minlength=num_regions) + np.bincount(r_final, minlength=num_regions)
+    )
+    out = {
+        "region": regions,
+        "lower": origin + np.stack(np.unravel_index(regions, shape), axis=1) * size,
+        "size": size,
+    }
+
+    for label, part, r in (("first", first, r_first), ("final", final, r_final)):
+        stats = _region_stats(part, r, num_regions)
+        for name, values in stats.items():
+            out[f"{label}_{name}"] = values[regions]
+
+    for name in ("elements", "mean_aspect_ratio", "error_elements", "mean_risk", "high_risk"):
+        out[f"delta_{name}"] = out[f"final_{name}"] - out[f"first_{name}"]
+
+    # Element-to-element changes along the correspondence
+    deltas = element_deltas(first, final, first_pos)
+    r = r_final[matched]
+    count = np.bincount(r, minlength=num_regions)[regions]
+    out["matched"] = count
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name in ("risk", "aspect_ratio"):
+            values = np.nan_to_num(deltas[f"delta_{name}"][matched], nan=0.0)
+            out[f"matched_delta_{name}"] = np.bincount(r, values, num_regions)[regions] / count
+    return out
+
+
+def _analysis_parts(analysis):
+    if isinstance(analysis, dict):
+        return analysis
+    return {
+        "mesh": analysis.mesh,
+        "metrics": analysis.metrics,
+        "errors": analysis.errors,
+        "risks": analysis.hybrid_risks,
+    }
+
+
+def _region_stats(part, region, num_regions):
+    elem_ids, columns = metric_columns(part["metrics"])
+    risks = aligned_values(part["risks"], elem_ids)
+    errors = part["errors"]
+    if hasattr(errors, "mask") and np.array_equal(errors.elem_ids, elem_ids):
+        has_error = errors.mask != 0
+    else:
+        has_error = np.array([eid in errors for eid in elem_ids.tolist()], dtype=bool)
+    high = risk_categories(risks) == "HIGH"
+
+    count = np.bincount(region, minlength=num_regions).astype(np.float64)
+    safe = np.maximum(count, 1)
+    aspect = np.nan_to_num(columns["aspect_ratio"], nan=0.0)
+    return {
+        "elements": count,
+        "mean_aspect_ratio": np.bincount(region, aspect, num_regions) / safe,
+        "error_elements": np.bincount(region, has_error, num_regions),
+        "mean_risk": np.bincount(region, risks, num_regions) / safe,
+        "high_risk": np.bincount(region, high, num_regions),
+    }
+
+
+def element_deltas(first, final, first_pos=None):
+    """
+    Per final-mesh element: the matched first-mesh element (-1 if none),
+    and aspect ratio and risk change against it (NaN when unmatched).
+    """
+    first, final = _analysis_parts(first), _analysis_parts(final)
+    if first_pos is None:
+        first_pos, _ = match_elements(first["mesh"], final["mesh"])
+
+    ids_first, cols_first = metric_columns(first["metrics"])
+    ids_final, cols_final = metric_columns(final["metrics"])
+    risk_first = aligned_values(first["risks"], ids_first)
+    risk_final = aligned_values(final["risks"], ids_final)
+
+    matched = np.flatnonzero(first_pos >= 0)
+    src = first_pos[matched]
+
+    out = {
+        "elem_ids": ids_final,
+        "first_elem_ids": np.full(len(ids_final), -1, dtype=np.int64),
+        "delta_aspect_ratio": np.full(len(ids_final), np.nan),
+        "delta_risk": np.full(len(ids_final), np.nan),
+    }
+    out["first_elem_ids"][matched] = ids_first[src]
+    out["delta_aspect_ratio"][matched] = (
+        cols_final["aspect_ratio"][matched] - cols_first["aspect_ratio"][src]
+    )
+    out["delta_risk"][matched] = risk_final[matched] - risk_first[src]
+    return out
@@ -0,0 +1,146 @@
+import numpy as np
+
+from core.element_table import ElementValues
+from core.mesh_diff import diff_meshes
+from core.mesh_neighbors import build_adjacency
+from quality.metrics import QualityMetrics, compute_quality_metrics
+from quality.rules import MeshErrors, check_columns, load_rules
+
+from ai.feature_builder import ERROR_RING, FeatureMatrix, feature_rows
+from ai.hybrid_risk import hybrid_risk_array
+from ai.rf_model import predict_failure_probability, train_rf_model
+from ai.risk_model import rule_risk_array
+
+
+class MeshAnalysis:
+    """Every stage result of one analyze_mesh run, plus the RF model used."""
+
+    def __init__(self, mesh, neighbors, metrics, errors, features,
+                 rule_risks, ml_probs, hybrid_risks, model=None):
+        self.mesh = mesh
+        self.neighbors = neighbors
+        self.metrics = metrics
+        self.errors = errors
+        self.features = features
+        self.rule_risks = rule_risks
+        self.ml_probs = ml_probs
+        self.hybrid_risks = hybrid_risks
+        self.model = model
+
+
+def update_analysis(previous, mesh, model=None, rules=None, ring=ERROR_RING):
+    """
+    Analyzes `mesh` by patching `previous` (a MeshAnalysis of an earlier
+    version of it). Elements are matched geometrically (see diff_meshes);
+    each stage is recomputed only where its inputs can have changed:
+
+        metrics   changed elements
+        errors    + their neighbors and survivors that lost a neighbor
+                    (neighbor_count feeds the rules), and elements the
+                    mesh checks flag now or flagged before
+        features  + `ring` further rings (ring_error_density)
+        risks     same rows as features
+
+    Everything else is copied from `previous`. The ML stage uses `model`,
+    else the previous run's model. Returns (MeshAnalysis, stats).
+    """
+    diff = diff_meshes(previous.mesh, mesh)
+    old_pos = diff.old_pos
+    n = mesh.num_elements
+    rules = rules or load_rules()
+
+    # Adjacency is a single vectorized sort; rebuilt whole
+    neighbors = build_adjacency(mesh, previous.neighbors.mode)
+    A = neighbors.to_sparse()
+    counts = neighbors.counts()
+
+    changed = np.zeros(n, dtype=bool)
+    changed[diff.changed] = True
+
+    # Metrics depend on the element alone
+    rows = np.flatnonzero(changed)
+    fresh = compute_quality_metrics(mesh.select_elements(rows)).columns
+    columns = {
+        name: _patch(col, old_pos, rows, fresh[name])
+        for name, col in previous.metrics.columns.items()
+    }
+    metrics = QualityMetrics(mesh.elem_ids, columns)
+
+    # Rules see neighbor counts; a new rule set (any rule field or setting)
+    # invalidates every row
+    dirty = changed | (A @ changed.astype(np.float64) > 0)
+    dirty[_lost_neighbor(previous.neighbors, diff)] = True
+    if rules.fingerprint != getattr(previous.errors, "rules_hash", None):
+        dirty[:] = True
+
+    # Mesh checks are global (a new element can duplicate an old one), so
+    # they run on the whole mesh; rows they flag, now or before, are redone
+    checks = check_columns(rules, mesh, n)
+    for name, col in checks.items():
+        dirty |= col != 0
+    for rule in rules.rules:
+        if rule.metric in checks and rule.code in previous.errors.codes:
+            was = previous.errors.has(rule.code)
+            dirty |= _patch(was, old_pos, np.flatnonzero(changed), False)
+    rows = np.flatnonzero(dirty)
+
+    sub = {name: col[rows] for name, col in columns.items()}
+    sub["neighbor_count"] = counts[rows]
+    sub.update({name: col[rows] for name, col in checks.items()})
+    mask = _patch(previous.errors.mask, old_pos, rows, rules.evaluate(sub, len(rows)))
+    errors = MeshErrors(mesh.elem_ids, mask.astype(rules.dtype), rules.codes, rules.severities,
+                        rules.fingerprint)
+
+    # Neighborhood features look `ring` rings past any dirty element
+    for _ in range(max(ring, 1)):
+        dirty = dirty | (A @ dirty.astype(np.float64) > 0)
+    rows = np.flatnonzero(dirty)
+
+    X = _patch(
+        previous.features.X, old_pos, rows,
+        feature_rows(columns, counts, errors.error_counts(), A, rows, ring)
+    )
+    features = FeatureMatrix(mesh.elem_ids, X, previous.features.names)
+    sub_features = FeatureMatrix(mesh.elem_ids[rows], X[rows], features.names)
+
+    model = model or previous.model or train_rf_model(previous.features, previous.errors)
+    rule = rule_risk_array(sub_features)
+    ml = predict_failure_probability(model, sub_features).array
+    hybrid = hybrid_risk_array(rule, ml)
+
+    analysis = MeshAnalysis(
+        mesh, neighbors, metrics, errors, features,
+        ElementValues(mesh.elem_ids, _patch(previous.rule_risks.array, old_pos, rows, rule)),
+        ElementValues(mesh.elem_ids, _patch(previous.ml_probs.array, old_pos, rows, ml)),
+        ElementValues(mesh.elem_ids, _patch(previous.hybrid_risks.array, old_pos, rows, hybrid)),
+        model,
+    )
+    stats = {
+        "elements": n,
+        "changed": int(changed.sum()),
+        "removed": len(diff.removed),
+        "recomputed": len(rows),
+    }
+    return analysis, stats
+
+
+def _patch(old, old_pos, rows, values):
+    """New-mesh array: unchanged rows copied from `old`, `rows` set to `values`."""
+    out = np.empty((len(old_pos),) + old.shape[1:], dtype=np.result_type(old, values))
+    kept = np.flatnonzero(old_pos >= 0)
+    out[kept] = old[old_pos[kept]]
+    out[rows] = values
+    return out
+
+
+def _lost_neighbor(old_neighbors, diff):
+    """New positions of unchanged elements that neighbored a removed element."""
+    removed = diff.removed
+    if len(removed) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    starts = old_neighbors.offsets[removed]
+    sizes = old_neighbors.offsets[removed + 1] - starts
+    idx = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+    new_pos = diff.new_positions(len(old_neighbors.elem_ids))[old_neighbors.indices[idx]]
+    return new_pos[new_pos >= 0]
@@ -1,7 +1,11 @@
+import numpy as np
+
 from ai.risk_model import risk_category
+from core.element_table import aligned_values
+from quality.rules import error_count_array
 
 
-def generate_scorecard(mesh, metrics, errors, risks):
+def generate_scorecard(mesh, metrics, errors, risks, topology=None):
     total_elements = len(metrics)
     total_nodes = len(mesh.nodes)
 
@@ -26,7 +30,7 @@ def generate_scorecard(mesh, metrics, errors, risks):
     else:
         overall_risk = "LOW"
 
-    return {
+    scorecard = {
         "total_nodes": total_nodes,
         "total_elements": total_elements,
         "avg_aspect_ratio": round(avg_aspect, 3),
@@ -36,4 +40,44 @@ def generate_scorecard(mesh, metrics, errors, risks):
         "risk_summary": risk_summary,
         "overall_mesh_risk": overall_risk
     }
- 
\ No newline at end of file
+
+    if topology is not None:
+        scorecard["components"] = component_summary(mesh, topology, errors, risks)
+    return scorecard
+
+def component_summary(mesh, topology, errors=None, risks=None):
+    """
+    One row per connected component of `mesh` (see quality/topology.py),
+    largest first: element count, free / non-manifold / flipped / gap
+    edges and, given errors and risks (tables or dicts), error elements
+    and mean / max risk.
+    """
+    labels = topology.component
+    n = topology.num_components
+    count = np.bincount(labels, minlength=n)
+
+    columns = {
+        "elements": count,
+        "free_edges": np.bincount(labels, topology.free_edges, n),
+        "nonmanifold_edges": np.bincount(labels, topology.nonmanifold_edges, n),
+        "flipped_edges": np.bincount(labels, topology.flipped_edges, n),
+        "gap_edges": np.bincount(labels, topology.gap_edges, n),
+    }
+    if errors is not None:
+        has_error = error_count_array(errors, mesh.elem_ids) > 0
+        columns["error_elements"] = np.bincount(labels, has_error, n)
+    if risks is not None:
+        values = aligned_values(risks, mesh.elem_ids)
+        columns["mean_risk"] = np.bincount(labels, values, n) / np.maximum(count, 1)
+        top = np.zeros(n)
+        np.maximum.at(top, labels, values)
+        columns["max_risk"] = top
+
+    rows = []
+    for c in range(n):
+        row = {"component": c}
+        for name, col in columns.items():
+            value = col[c]
+            row[name] = round(float(value), 3) if name.endswith("risk") else int(value)
+        rows.append(row)
+    return rows
@@ -0,0 +1,77 @@
+# ==========================================
+# RANDOM FOREST INFERENCE BENCHMARK
+# python -m benchmarks.bench_inference [nx] [ny]
+# ==========================================
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from ai.feature_builder import build_feature_matrix
+from ai.rf_model import compile_forest, predict_failure_probability, train_rf_model
+from benchmarks.synthetic import write_grid_mesh
+from core.mesh_loader import load_mesh
+from core.mesh_neighbors import build_adjacency
+from quality.metrics import compute_quality_metrics
+from quality.rules import detect_mesh_errors
+
+
+LOOP_SAMPLE = 2000
+SMALL_BATCH = 500
+
+
+def main():
+    nx = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    ny = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    with tempfile.TemporaryDirectory() as tmp:
+        node_csv = os.path.join(tmp, "bench_NODE.csv")
+        elem_csv = os.path.join(tmp, "bench_ELEMENT.csv")
+        write_grid_mesh(node_csv, elem_csv, nx, ny)
+        mesh = load_mesh(node_csv, elem_csv, cache=False)
+
+    neighbors = build_adjacency(mesh)
+    metrics = compute_quality_metrics(mesh)
+    errors = detect_mesh_errors(metrics, neighbors)
+    features = build_feature_matrix(metrics, neighbors, errors)
+    model = train_rf_model(features, errors)
+    n = len(features)
+    print(f"{n:,} elements, {len(model.estimators_)} trees")
+
+    # Per-element loop (original implementation), timed on a sample
+    sample = list(features.items())[:LOOP_SAMPLE]
+    start = time.perf_counter()
+    for _, f in sample:
+        model.predict_proba([f])[0][1]
+    per_elem = (time.perf_counter() - start) / len(sample)
+    print(f"{'per-element loop':<22} {per_elem * n:8.2f} s (extrapolated)")
+
+    start = time.perf_counter()
+    batched = predict_failure_probability(model, features)
+    print(f"{'batched predict_proba':<22} {time.perf_counter() - start:8.2f} s")
+
+    start = time.perf_counter()
+    compiled = compile_forest(model)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    fast = predict_failure_probability(compiled, features)
+    print(f"{'compiled forest':<22} {time.perf_counter() - start:8.2f} s"
+          f"  (+{build:.2f} s compile)")
+
+    print(f"max |batched - compiled| = {np.abs(batched.array - fast.array).max():.2e}")
+
+    # Small batches (incremental updates, picking): per-call overhead dominates
+    small = features.X[:SMALL_BATCH]
+    for label, evaluator in (("sklearn", model), ("compiled", compiled)):
+        start = time.perf_counter()
+        for _ in range(20):
+            evaluator.predict_proba(small)
+        elapsed = (time.perf_counter() - start) / 20
+        print(f"{label + f' x{SMALL_BATCH} rows':<22} {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
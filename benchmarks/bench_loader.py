@@ -0,0 +1,52 @@
+# ==========================================
+# CSV LOADER BENCHMARK
+# python -m benchmarks.bench_loader [nx] [ny] [workers]
+# (row counts include both files)
+# ==========================================
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_grid_mesh
+from core.mesh_loader import load_mesh, load_mesh_rows
+
+
+def time_loader(label, loader, node_csv, elem_csv, rows):
+    start = time.perf_counter()
+    mesh = loader(node_csv, elem_csv)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:8.3f} s   {rows / elapsed:14,.0f} rows/s")
+    return mesh
+
+
+def main():
+    nx = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    ny = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        node_csv = os.path.join(tmp, "bench_NODE.csv")
+        elem_csv = os.path.join(tmp, "bench_ELEMENT.csv")
+        n_nodes, n_elems = write_grid_mesh(node_csv, elem_csv, nx, ny)
+        rows = n_nodes + n_elems
+        print(f"{n_nodes:,} nodes, {n_elems:,} elements")
+
+        time_loader("row loader (csv)", load_mesh_rows, node_csv, elem_csv, rows)
+        time_loader(
+            "bulk loader",
+            lambda n, e: load_mesh(n, e, cache=False),
+            node_csv, elem_csv, rows
+        )
+        time_loader(
+            f"bulk loader x{workers}",
+            lambda n, e: load_mesh(n, e, workers=workers, cache=False),
+            node_csv, elem_csv, rows
+        )
+        time_loader("bulk + write cache", load_mesh, node_csv, elem_csv, rows)
+        time_loader("mmap cache", load_mesh, node_csv, elem_csv, rows)
+
+
+if __name__ == "__main__":
+    main()
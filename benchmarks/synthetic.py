@@ -0,0 +1,49 @@
+# ==========================================
+# SYNTHETIC MESH CSV GENERATOR (BENCHMARKS)
+# ==========================================
+
+import numpy as np
+
+
+def write_grid_mesh(node_csv, elem_csv, nx, ny, tri_every=7, seed=0):
+    """
+    Writes a perturbed nx * ny quad grid in the NODE/ELEMENT CSV layout
+    main.py reads. Every `tri_every`-th cell is split into two triangles,
+    whose rows carry a blank trailing connectivity column.
+    """
+    rng = np.random.default_rng(seed)
+
+    gx, gy = np.meshgrid(np.arange(nx + 1, dtype=float), np.arange(ny + 1, dtype=float))
+    gx += rng.normal(0, 0.15, gx.shape)
+    gy += rng.normal(0, 0.15, gy.shape)
+    gz = 0.1 * np.sin(gx / 5.0)
+
+    node_ids = np.arange(1, gx.size + 1)
+    nodes = np.column_stack([node_ids, gx.ravel(), gy.ravel(), gz.ravel()])
+    with open(node_csv, "w") as f:
+        f.write("node_id,x,y,z\n")
+        np.savetxt(f, nodes, fmt=["%d", "%.6f", "%.6f", "%.6f"], delimiter=",")
+
+    ii, jj = np.meshgrid(np.arange(nx), np.arange(ny))
+    ii, jj = ii.ravel(), jj.ravel()
+    a = jj * (nx + 1) + ii + 1
+    b, c, d = a + 1, a + nx + 2, a + nx + 1
+
+    split = (ii + jj) % tri_every == 0
+    quads = np.column_stack([a, b, c, d])[~split]
+    tris = np.concatenate([
+        np.column_stack([a, b, c])[split],
+        np.column_stack([a, c, d])[split],
+    ])
+
+    with open(elem_csv, "w") as f:
+        f.write("elem_id,elem_type,n1,n2,n3,n4\n")
+        eid = 1
+        for n1, n2, n3, n4 in quads:
+            f.write(f"{eid},CQUAD4,{n1},{n2},{n3},{n4}\n")
+            eid += 1
+        for n1, n2, n3 in tris:
+            f.write(f"{eid},CTRIA3,{n1},{n2},{n3},\n")
+            eid += 1
+
+    return len(nodes), eid - 1
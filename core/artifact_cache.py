@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+
+DEFAULT_CACHE_DIR = ".mesh_artifacts"
+DEFAULT_MAX_BYTES = 2 << 30
+
+# ----------------------------------------------------------------
+# Layout
+#   <root>/<key>/meta.json      class meta + bookkeeping
+#   <root>/<key>/<name>.npy     one file per array, loaded mmap'd
+#
+# A key is a hash of the stage name, its code version, its params and
+# the keys of the artifacts it was computed from, so editing an input
+# CSV, the rule config or a stage module invalidates that stage and
+# everything downstream. meta.json's mtime is the last-use time for
+# LRU eviction.
+# ----------------------------------------------------------------
+
+
+class ArtifactCache:
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def key(self, stage, deps=(), params=None, code=()):
+        """
+        `deps`: keys (or content hashes) of the inputs; `params`: JSON-able
+        stage parameters; `code`: modules whose source versions the stage.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(json.dumps({
+            "stage": stage,
+            "deps": list(deps),
+            "params": params,
+            "code": [code_version(m) for m in code],
+        }, sort_keys=True, default=str).encode())
+        return f"{stage}-{h.hexdigest()}"
+
+    def get(self, key):
+        """(arrays, meta) for `key`, or None. Arrays are read-only memmaps."""
+        path = os.path.join(self.root, key)
+        meta_path = os.path.join(path, "meta.json")
+        try:
+            with open(meta_path) as f:
+                record = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                for name in record["arrays"]
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+
+        os.utime(meta_path)
+        return arrays, record["meta"]
+
+    def put(self, key, arrays, meta):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(arr))
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"arrays": list(arrays), "meta": meta}, f)
+
+        path = os.path.join(self.root, key)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # Another run stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self.evict()
+
+    def entries(self):
+        """[(last_used, size_bytes, path)] for every stored artifact."""
+        if not os.path.isdir(self.root):
+            return []
+        out = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            meta_path = os.path.join(path, "meta.json")
+            if name.startswith(".") or not os.path.exists(meta_path):
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(path))
+            out.append((os.stat(meta_path).st_mtime_ns, size, path))
+        return out
+
+    def evict(self):
+        """Drops least recently used artifacts until under max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+_CODE_VERSIONS = {}
+
+
+def code_version(module):
+    """Hash of a module's source file, computed once per process."""
+    path = module.__file__
+    if path not in _CODE_VERSIONS:
+        with open(path, "rb") as f:
+            _CODE_VERSIONS[path] = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    return _CODE_VERSIONS[path]
+
+
+def cached_stage(cache, key, table_cls, compute):
+    """
+    Runs one pipeline stage through `cache`: the stored table_cls result
+    for `key` if there is one, else compute()'s result, which is stored.
+    Without a cache or key it just computes.
+    """
+    if cache is None or key is None:
+        return compute()
+
+    hit = cache.get(key)
+    if hit is not None:
+        return table_cls.from_arrays(*hit)
+
+    result = compute()
+    cache.put(key, *result.to_arrays())
+    return result
+
+
+def store_stage(cache, key, table):
+    """Stores an already computed stage result under `key` unless present."""
+    if cache is not None and key is not None and cache.get(key) is None:
+        cache.put(key, *table.to_arrays())
@@ -0,0 +1,111 @@
+from abc import ABC, abstractmethod
+from collections.abc import ItemsView, Mapping, ValuesView
+
+import numpy as np
+
+
+class ElementTable(Mapping, ABC):
+    """
+    Base for per-element results held as arrays aligned with `elem_ids`
+    (position i belongs to elem_ids[i]) and exposed as a read-only
+    elem_id -> value dict for code written against the old dict outputs.
+
+    Subclasses implement `_row(pos)`, `to_arrays()` and `from_arrays()`;
+    `_rows()` may be overridden with a faster bulk iterator.
+    """
+
+    def __init__(self, elem_ids):
+        self.elem_ids = np.asarray(elem_ids, dtype=np.int64)
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = dict(
+                zip(self.elem_ids.tolist(), range(len(self.elem_ids)))
+            )
+        return self._index
+
+    @abstractmethod
+    def _row(self, pos):
+        pass
+
+    def _rows(self):
+        for pos in range(len(self.elem_ids)):
+            yield self._row(pos)
+
+    def __getitem__(self, elem_id):
+        return self._row(self.index[elem_id])
+
+    def __contains__(self, elem_id):
+        return elem_id in self.index
+
+    def __iter__(self):
+        return iter(self.elem_ids.tolist())
+
+    def __len__(self):
+        return len(self.elem_ids)
+
+    def values(self):
+        return _TableValues(self)
+
+    def items(self):
+        return _TableItems(self)
+
+    # Serialization: (arrays, meta) with a dict of numpy arrays and a
+    # JSON-able dict; from_arrays(*table.to_arrays()) rebuilds the table.
+
+    @abstractmethod
+    def to_arrays(self):
+        pass
+
+    @classmethod
+    @abstractmethod
+    def from_arrays(cls, arrays, meta):
+        pass
+
+
+class _TableValues(ValuesView):
+    def __iter__(self):
+        return self._mapping._rows()
+
+
+class _TableItems(ItemsView):
+    def __iter__(self):
+        return zip(iter(self._mapping), self._mapping._rows())
+
+
+class ElementValues(ElementTable):
+    """One value per element: `array` (E,), dict view elem_id -> float."""
+
+    def __init__(self, elem_ids, values):
+        super().__init__(elem_ids)
+        self.array = np.asarray(values)
+
+    def _row(self, pos):
+        return self.array[pos].item()
+
+    def _rows(self):
+        return iter(self.array.tolist())
+
+    def to_arrays(self):
+        return {"elem_ids": self.elem_ids, "values": self.array}, {}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays["elem_ids"], arrays["values"])
+
+
+def aligned_values(table, elem_ids, default=0.0):
+    """
+    Array of `table`'s values in `elem_ids` order. Uses the array directly
+    when `table` is an ElementValues over the same ids, else dict lookups.
+    """
+    if isinstance(table, ElementValues) and np.array_equal(table.elem_ids, elem_ids):
+        return table.array
+    if isinstance(table, np.ndarray):
+        return table
+    return np.array(
+        [table.get(eid, default) for eid in np.asarray(elem_ids).tolist()],
+        dtype=np.float64
+    )
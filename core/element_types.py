@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class ElementType:
+    """
+    Static description of an element type.
+        corners: number of corner nodes (the first `corners` ids)
+        edges:   corner index pairs
+        faces:   corner index tuples, outward-oriented for solids
+    """
+
+    def __init__(self, name, num_nodes, dim, corners, edges, faces):
+        self.name = name
+        self.num_nodes = num_nodes
+        self.dim = dim
+        self.corners = corners
+        self.edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+        self.faces = [tuple(f) for f in faces]
+
+
+def _polygon(name, k):
+    return ElementType(
+        name, k, 2, k, [(i, (i + 1) % k) for i in range(k)], [tuple(range(k))]
+    )
+
+
+_TET_EDGES = [(0, 1), (1, 2), (2, 0), (0, 3), (1, 3), (2, 3)]
+_TET_FACES = [(0, 2, 1), (0, 1, 3), (1, 2, 3), (0, 3, 2)]
+
+_HEX_EDGES = [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4),
+              (0, 4), (1, 5), (2, 6), (3, 7)]
+_HEX_FACES = [(0, 3, 2, 1), (4, 5, 6, 7), (0, 1, 5, 4), (1, 2, 6, 5),
+              (2, 3, 7, 6), (3, 0, 4, 7)]
+
+_PENTA_EDGES = [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3),
+                (0, 3), (1, 4), (2, 5)]
+_PENTA_FACES = [(0, 2, 1), (3, 4, 5), (0, 1, 4, 3), (1, 2, 5, 4), (2, 0, 3, 5)]
+
+
+ELEMENT_TYPES = {
+    "TRIA3": _polygon("TRIA3", 3),
+    "QUAD4": _polygon("QUAD4", 4),
+    "TET4": ElementType("TET4", 4, 3, 4, _TET_EDGES, _TET_FACES),
+    "TET10": ElementType("TET10", 10, 3, 4, _TET_EDGES, _TET_FACES),
+    "HEX8": ElementType("HEX8", 8, 3, 8, _HEX_EDGES, _HEX_FACES),
+    "PENTA6": ElementType("PENTA6", 6, 3, 6, _PENTA_EDGES, _PENTA_FACES),
+}
+
+# elem_type column labels (Nastran, Abaqus, generic) -> candidate types;
+# the node count picks between candidates (e.g. CTETRA with 4 or 10 ids).
+TYPE_ALIASES = {
+    "TRIA3": ("TRIA3",), "CTRIA3": ("TRIA3",), "TRI": ("TRIA3",),
+    "S3": ("TRIA3",), "S3R": ("TRIA3",),
+    "QUAD4": ("QUAD4",), "CQUAD4": ("QUAD4",), "QUAD": ("QUAD4",),
+    "S4": ("QUAD4",), "S4R": ("QUAD4",),
+    "TET4": ("TET4",), "TET10": ("TET10",), "CTETRA": ("TET4", "TET10"),
+    "TETRA": ("TET4", "TET10"), "C3D4": ("TET4",), "C3D10": ("TET10",),
+    "HEX8": ("HEX8",), "CHEXA": ("HEX8",), "HEXA": ("HEX8",),
+    "C3D8": ("HEX8",), "C3D8R": ("HEX8",),
+    "PENTA6": ("PENTA6",), "CPENTA": ("PENTA6",), "WEDGE": ("PENTA6",),
+    "C3D6": ("PENTA6",),
+}
+
+SHELL_TYPES = {3: "TRIA3", 4: "QUAD4"}
+
+
+def resolve_element_type(label, num_nodes):
+    """
+    Canonical type name for an elem_type label and node count. Unknown or
+    inconsistent labels fall back to the node count, which treats 3 and 4
+    nodes as shells like the original loader did.
+    """
+    num_nodes = int(num_nodes)
+    for name in TYPE_ALIASES.get(str(label).strip().upper(), ()):
+        if ELEMENT_TYPES[name].num_nodes == num_nodes:
+            return name
+    return SHELL_TYPES.get(num_nodes, f"POLY{num_nodes}")
+
+
+def element_type(name):
+    """ElementType for a canonical name; unknown POLYn names are polygons."""
+    if name not in ELEMENT_TYPES:
+        return _polygon(name, int(name[4:]) if name.startswith("POLY") else 0)
+    return ELEMENT_TYPES[name]
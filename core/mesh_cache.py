@@ -0,0 +1,204 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .mesh_objects import ElementBlock, Mesh
+
+
+# ----------------------------------------------------------------
+# Layout
+#   MAGIC (8 bytes) | header length (uint64 LE) | JSON header
+#   | 64-byte aligned array blocks
+#
+# The JSON header records the source CSV fingerprints and, for every
+# array, its dtype, shape and byte offset. Arrays are opened as
+# read-only views over one mmap, so nothing is read until touched.
+# ----------------------------------------------------------------
+
+MAGIC = b"MESHBIN\x00"
+VERSION = 2
+ALIGN = 64
+SUFFIX = ".meshbin"
+
+_PREFIX = struct.Struct("<8sQ")
+
+
+def cache_path_for(element_csv_path):
+    return os.path.splitext(element_csv_path)[0] + SUFFIX
+
+
+def file_fingerprint(path, with_hash=True):
+    st = os.stat(path)
+    fp = {
+        "path": os.path.abspath(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+    if with_hash:
+        fp["hash"] = file_hash(path)
+    return fp
+
+
+def file_hash(path, chunk_size=1 << 22):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def is_fresh(recorded, path):
+    """
+    Size and mtime decide the fast path; if only the mtime moved the
+    content hash is compared, so a touched-but-unchanged CSV stays cached.
+    """
+    if recorded is None or recorded["path"] != os.path.abspath(path):
+        return False
+
+    current = file_fingerprint(path, with_hash=False)
+    if current["size"] != recorded["size"]:
+        return False
+    if current["mtime_ns"] == recorded["mtime_ns"]:
+        return True
+    return file_hash(path) == recorded["hash"]
+
+
+# ----------------------------------------------------------------
+# Write
+# ----------------------------------------------------------------
+
+def write_mesh_cache(mesh, cache_path, sources):
+    """
+    Writes `mesh` to `cache_path`. `sources` maps a role ("nodes",
+    "elements") to the CSV path it was read from.
+    """
+    arrays = {
+        "node_ids": mesh.node_ids,
+        "coords": mesh.coords,
+        "elem_ids": mesh.elem_ids,
+        "elem_types": mesh.elem_types,
+        "elem_block": mesh.elem_block,
+        "elem_row": mesh.elem_row,
+        # id indexes: argsort orders used for vectorized id -> position lookups
+        "node_order": np.argsort(mesh.node_ids, kind="stable"),
+        "elem_order": np.argsort(mesh.elem_ids, kind="stable"),
+    }
+    blocks = []
+    for i, (name, block) in enumerate(mesh.blocks.items()):
+        arrays[f"block{i}_elem_index"] = block.elem_index
+        arrays[f"block{i}_conn"] = block.conn
+        blocks.append({
+            "elem_type": name,
+            "elem_index": f"block{i}_elem_index",
+            "conn": f"block{i}_conn",
+        })
+
+    header = {
+        "version": VERSION,
+        "sources": {role: file_fingerprint(p) for role, p in sources.items()},
+        "blocks": blocks,
+        "arrays": {},
+    }
+
+    # Offsets depend on the header size, which depends on the offsets;
+    # reserve room by sizing the header with placeholder offsets first.
+    arrays = {k: np.ascontiguousarray(v) for k, v in arrays.items()}
+    for name, arr in arrays.items():
+        header["arrays"][name] = {
+            "dtype": arr.dtype.str, "shape": list(arr.shape), "offset": 0,
+        }
+    reserved = _align(_PREFIX.size + len(_encode(header)) + 32 * len(arrays))
+
+    offset = reserved
+    for name, arr in arrays.items():
+        header["arrays"][name]["offset"] = offset
+        offset = _align(offset + arr.nbytes)
+
+    raw = _encode(header)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(raw)))
+        f.write(raw)
+        for name, arr in arrays.items():
+            f.seek(header["arrays"][name]["offset"])
+            f.write(arr.tobytes())
+        f.truncate(offset)
+    os.replace(tmp_path, cache_path)
+
+
+# ----------------------------------------------------------------
+# Read
+# ----------------------------------------------------------------
+
+def read_cache_header(cache_path):
+    with open(cache_path, "rb") as f:
+        magic, length = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{cache_path} is not a mesh cache file")
+        header = json.loads(f.read(length))
+    if header.get("version") != VERSION:
+        raise ValueError(f"{cache_path}: unsupported cache version")
+    return header
+
+
+def open_mesh_cache(cache_path):
+    """Opens a cache file as a Mesh whose arrays are mmap-backed views."""
+    header = read_cache_header(cache_path)
+
+    with open(cache_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(
+            mm, dtype=dtype, count=count, offset=spec["offset"]
+        ).reshape(shape)
+
+    blocks = {
+        b["elem_type"]: ElementBlock(
+            b["elem_type"], arrays[b["elem_index"]], arrays[b["conn"]]
+        )
+        for b in header["blocks"]
+    }
+
+    mesh = Mesh(
+        arrays["node_ids"], arrays["coords"], arrays["elem_ids"], blocks,
+        elem_types=arrays["elem_types"], dtype=arrays["coords"].dtype,
+        elem_block=arrays["elem_block"], elem_row=arrays["elem_row"],
+    )
+    mesh._node_order = arrays["node_order"]
+    mesh._elem_order = arrays["elem_order"]
+    return mesh
+
+
+def load_cached_mesh(node_csv_path, element_csv_path, cache_path=None):
+    """Returns the cached Mesh for these CSVs, or None if missing or stale."""
+    cache_path = cache_path or cache_path_for(element_csv_path)
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        sources = read_cache_header(cache_path)["sources"]
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if not (is_fresh(sources.get("nodes"), node_csv_path)
+            and is_fresh(sources.get("elements"), element_csv_path)):
+        return None
+
+    return open_mesh_cache(cache_path)
+
+
+def _encode(header):
+    return json.dumps(header, separators=(",", ":")).encode()
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+class MeshDiff:
+    """
+    Element correspondence between an old and a new mesh.
+        old_pos:  (E_new,) position of the identical old element, -1 for
+                  new or changed elements
+        removed:  old positions no new element matches
+    """
+
+    def __init__(self, old_pos, num_old):
+        self.old_pos = old_pos
+        matched = np.zeros(num_old, dtype=bool)
+        matched[old_pos[old_pos >= 0]] = True
+        self.removed = np.flatnonzero(~matched)
+
+    @property
+    def changed(self):
+        return np.flatnonzero(self.old_pos < 0)
+
+    def new_positions(self, num_old):
+        """(E_old,) new position of each unchanged old element, -1 otherwise."""
+        out = np.full(num_old, -1, dtype=np.int64)
+        kept = np.flatnonzero(self.old_pos >= 0)
+        out[self.old_pos[kept]] = kept
+        return out
+
+
+def match_nodes(old, new):
+    """
+    (N_new,) position of the old node at exactly the same coordinates, or
+    -1. Old nodes claimed by several new nodes match none of them, so
+    merged or split coincident nodes always show up as changes.
+    """
+    match = match_rows(old.coords, new.coords)
+    hit = match[match >= 0]
+    claims = np.bincount(hit, minlength=old.num_nodes)
+    match[match >= 0] = np.where(claims[hit] == 1, hit, -1)
+    return match
+
+
+def diff_meshes(old, new):
+    """
+    Matches elements by geometry rather than id: a new element is
+    unchanged when an old element of the same type has the same
+    connectivity, node for node, after mapping nodes by coordinates.
+    """
+    node_map = match_nodes(old, new)
+    old_pos = np.full(new.num_elements, -1, dtype=np.int64)
+
+    for name, block in new.blocks.items():
+        old_block = old.blocks.get(name)
+        if old_block is None or len(old_block) == 0 or len(block) == 0:
+            continue
+
+        conn = node_map[block.conn]
+        ok = np.flatnonzero((conn >= 0).all(axis=1))
+        rows = match_rows(old_block.conn, conn[ok])
+        hit = rows >= 0
+        old_pos[block.elem_index[ok[hit]]] = old_block.elem_index[rows[hit]]
+
+    return MeshDiff(old_pos, old.num_elements)
+
+
+def match_rows(ref, query):
+    """
+    For every row of `query`, the position of an identical row of `ref`
+    (compared bitwise), or -1. Rows are hashed, looked up in the sorted
+    reference hashes and then compared in full.
+    """
+    out = np.full(len(query), -1, dtype=np.int64)
+    if len(ref) == 0 or len(query) == 0:
+        return out
+    ref = np.ascontiguousarray(ref).reshape(len(ref), -1)
+    query = np.ascontiguousarray(query).reshape(len(query), -1)
+
+    ref_keys = _row_hash(ref)
+    order = np.argsort(ref_keys, kind="stable")
+    sorted_keys = ref_keys[order]
+
+    query_keys = _row_hash(query)
+    at = np.minimum(np.searchsorted(sorted_keys, query_keys), len(ref) - 1)
+    cand = order[at]
+    same = (sorted_keys[at] == query_keys) & (ref[cand] == query).all(axis=1)
+    out[same] = cand[same]
+    return out
+
+
+def _row_hash(a):
+    bits = a.view(np.uint64) if a.dtype.itemsize == 8 else a.astype(np.uint64)
+    h = np.zeros(len(a), dtype=np.uint64)
+    for col in bits.T:
+        h = _mix(h ^ col)
+    return h
+
+
+def _mix(x):
+    # splitmix64 finalizer
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
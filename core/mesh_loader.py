@@ -1,23 +1,211 @@
 import csv
-from .mesh_objects import Mesh, Node, Element
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
+import pandas as pd
 
-def load_mesh(node_csv_path, element_csv_path):
-    mesh = Mesh()
+from .mesh_cache import cache_path_for, load_cached_mesh, write_mesh_cache
+from .mesh_objects import Mesh
+
+
+CHUNK_ROWS = 500_000
+
+
+def load_mesh(node_csv_path, element_csv_path, workers=1, chunk_rows=CHUNK_ROWS,
+              cache=True):
+    """
+    Bulk CSV loader. Parses NODE/ELEMENT files in chunks straight into
+    numeric arrays; workers > 1 splits each file across processes.
+    Falls back to the row-by-row reader for files pandas cannot tokenize.
+
+    With cache=True a binary sidecar (<element csv>.meshbin) is written on
+    first read and memory-mapped on later reads while the CSVs are unchanged.
+    """
+    if cache:
+        mesh = load_cached_mesh(node_csv_path, element_csv_path)
+        if mesh is not None:
+            return mesh
+
+    try:
+        node_ids, coords = read_node_csv(node_csv_path, workers, chunk_rows)
+        elem_ids, elem_types, conn, num_nodes = read_element_csv(
+            element_csv_path, workers, chunk_rows
+        )
+        mesh = Mesh.from_connectivity(
+            node_ids, coords, elem_ids, conn, num_nodes, elem_types=elem_types
+        )
+    except pd.errors.ParserError:
+        mesh = load_mesh_rows(node_csv_path, element_csv_path)
+
+    if cache:
+        try:
+            write_mesh_cache(
+                mesh, cache_path_for(element_csv_path),
+                {"nodes": node_csv_path, "elements": element_csv_path}
+            )
+        except OSError as exc:
+            print(f"Mesh cache not written: {exc}")
+
+    return mesh
+
+
+def load_mesh_rows(node_csv_path, element_csv_path):
+    """Row-by-row csv.reader loader, tolerant of ragged rows of any width."""
+    node_ids, coords = [], []
 
     with open(node_csv_path, 'r') as f:
         reader = csv.reader(f)
         header = next(reader)  # Skip header
         for row in reader:
             node_id, x, y, z = row
-            mesh.nodes[int(node_id)] = Node(node_id, x, y, z)
+            node_ids.append(int(node_id))
+            coords.append((float(x), float(y), float(z)))
+
+    elem_ids, elem_types, connectivity = [], [], []
 
     with open(element_csv_path, 'r') as f:
         reader = csv.reader(f)
         header = next(reader)  # Skip header
         for row in reader:
-            elem_id, elem_type, *node_ids = row
-            node_ids = [int(float(nid)) for nid in node_ids if nid.strip()]
-            mesh.elements[int(elem_id)] = Element(elem_id, node_ids)
+            elem_id, elem_type, *node_ids_row = row
+            connectivity.append(
+                [int(float(nid)) for nid in node_ids_row if nid.strip()]
+            )
+            elem_ids.append(int(elem_id))
+            elem_types.append(elem_type.strip())
+
+    num_nodes = np.array([len(c) for c in connectivity], dtype=np.int64)
+    conn = np.zeros((len(connectivity), num_nodes.max(initial=0)), dtype=np.int64)
+    for row, ids in enumerate(connectivity):
+        conn[row, :len(ids)] = ids
+
+    return Mesh.from_connectivity(
+        node_ids, coords, elem_ids, conn, num_nodes, elem_types=elem_types
+    )
+
+
+# ----------------------------------------------------------------
+# Array readers
+# ----------------------------------------------------------------
+
+def read_node_csv(path, workers=1, chunk_rows=CHUNK_ROWS):
+    """Returns node_ids (N,) int64 and coords (N, 3) float64."""
+    parts = _read_parts(path, _parse_nodes, workers, chunk_rows)
+    if not parts:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 3))
+
+    node_ids = np.concatenate([p[0] for p in parts])
+    coords = np.concatenate([p[1] for p in parts])
+    return node_ids, coords
+
+
+def read_element_csv(path, workers=1, chunk_rows=CHUNK_ROWS):
+    """
+    Returns elem_ids (E,), elem_types (E,), conn (E, W) node ids padded
+    with zeros, and num_nodes (E,) giving the used width of each row.
+    """
+    parts = _read_parts(path, _parse_elements, workers, chunk_rows)
+    if not parts:
+        return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=str),
+                np.zeros((0, 0), dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+    width = max(p[2].shape[1] for p in parts)
+    conn = np.concatenate([
+        np.pad(p[2], ((0, 0), (0, width - p[2].shape[1]))) for p in parts
+    ])
+    return (
+        np.concatenate([p[0] for p in parts]),
+        np.concatenate([p[1] for p in parts]),
+        conn,
+        np.concatenate([p[3] for p in parts]),
+    )
+
+
+def _read_parts(path, parse, workers, chunk_rows):
+    with open(path, 'rb') as f:
+        header = f.readline().decode().strip().split(",")
+        data_start = f.tell()
+
+    ranges = _byte_ranges(path, data_start, max(1, workers or 1))
+    if len(ranges) == 1:
+        return _parse_range(path, *ranges[0], header, parse, chunk_rows)
+
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [
+            pool.submit(_parse_range, path, start, end, header, parse, chunk_rows)
+            for start, end in ranges
+        ]
+        return [part for fut in futures for part in fut.result()]
+
+
+def _byte_ranges(path, data_start, parts):
+    """Splits the data section into `parts` ranges aligned to line starts."""
+    size = os.path.getsize(path)
+    bounds = [data_start]
+
+    with open(path, 'rb') as f:
+        for i in range(1, parts):
+            target = data_start + (size - data_start) * i // parts
+            if target <= bounds[-1]:
+                continue
+            f.seek(target)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a] or [(size, size)]
+
+
+def _parse_range(path, start, end, header, parse, chunk_rows):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    if not data.strip():
+        return []
+
+    columns = range(len(header))
+    dtype = dict.fromkeys(columns, np.float64)
+    if parse is _parse_elements:
+        dtype[1] = "category"
+
+    reader = pd.read_csv(
+        io.BytesIO(data),
+        header=None,
+        names=columns,
+        skipinitialspace=True,
+        chunksize=chunk_rows,
+        dtype=dtype,
+        engine="c",
+    )
+    return [parse(chunk) for chunk in reader]
+
+
+def _parse_nodes(chunk):
+    values = chunk.iloc[:, :4].to_numpy(dtype=np.float64)
+    return values[:, 0].astype(np.int64), np.ascontiguousarray(values[:, 1:4])
+
+
+def _parse_elements(chunk):
+    elem_ids = chunk.iloc[:, 0].to_numpy(dtype=np.float64).astype(np.int64)
+    types = chunk.iloc[:, 1]
+    labels = np.array(
+        [str(c).strip() for c in types.cat.categories] + [""], dtype=str
+    )
+    elem_types = labels[types.cat.codes.to_numpy()]  # code -1 (blank) -> ""
+    ids = chunk.iloc[:, 2:].to_numpy(dtype=np.float64)
+
+    blank = np.isnan(ids)
+    # Blank columns before a used one are dropped, like the row reader does
+    if (blank[:, :-1] & ~blank[:, 1:]).any():
+        order = np.argsort(blank, axis=1, kind="stable")
+        ids = np.take_along_axis(ids, order, axis=1)
+        blank = np.take_along_axis(blank, order, axis=1)
 
-    return mesh
\ No newline at end of file
+    num_nodes = (~blank).sum(axis=1)
+    conn = np.where(blank, 0, ids).astype(np.int64)
+    return elem_ids, elem_types, conn, num_nodes
@@ -1,19 +1,306 @@
-from collections import defaultdict
+import numpy as np
+from scipy import sparse
 
+from .element_table import ElementTable
+from .element_types import element_type
 
-def build_element_neighbors(mesh):
-    node_to_elements = defaultdict(set)
 
-    for elem_id, element in mesh.elements.items():
-        for nid in element.node_ids:
-            node_to_elements[nid].add(elem_id)
+EDGE = "edge"   # neighbors share an element edge
+NODE = "node"   # neighbors share at least one node (includes corner contact)
 
-    neighbors = defaultdict(set)
 
-    for elem_set in node_to_elements.values():
-        for e1 in elem_set:
-            for e2 in elem_set:
-                if e1 != e2:
-                    neighbors[e1].add(e2)
+class ElementAdjacency(ElementTable):
+    """
+    Element adjacency in CSR form over element positions:
+    the neighbors of elem_ids[p] are elem_ids[indices[offsets[p]:offsets[p + 1]]].
 
-    return neighbors
+    As a dict it maps elem_id -> set of neighbor elem_ids.
+    """
+
+    def __init__(self, elem_ids, offsets, indices, mode):
+        super().__init__(elem_ids)
+        self.offsets = offsets
+        self.indices = indices
+        self.mode = mode
+
+    def counts(self):
+        return np.diff(self.offsets)
+
+    def neighbors_of(self, pos):
+        return self.indices[self.offsets[pos]:self.offsets[pos + 1]]
+
+    def to_sparse(self):
+        """(E, E) CSR matrix with a 1 for every neighbor pair."""
+        n = len(self.elem_ids)
+        data = np.ones(len(self.indices), dtype=np.float64)
+        return sparse.csr_matrix((data, self.indices, self.offsets), shape=(n, n))
+
+    def to_arrays(self):
+        arrays = {"elem_ids": self.elem_ids, "offsets": self.offsets, "indices": self.indices}
+        return arrays, {"mode": self.mode}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays["elem_ids"], arrays["offsets"], arrays["indices"], meta["mode"])
+
+    def _row(self, pos):
+        return set(self.elem_ids[self.neighbors_of(pos)].tolist())
+
+    def _rows(self):
+        ids = self.elem_ids[self.indices].tolist()
+        bounds = self.offsets.tolist()
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            yield set(ids[start:stop])
+
+
+def edge_table(mesh):
+    """
+    One row per (element, edge): node positions n1 < n2 and the element
+    position. Edges are the corner-to-corner edges of each element type.
+    """
+    n1, n2, elems = [], [], []
+
+    for block in mesh.blocks.values():
+        local = element_type(block.elem_type).edges
+        if block.nodes_per_element < 2 or len(local) == 0:
+            continue
+        a = block.conn[:, local[:, 0]]
+        b = block.conn[:, local[:, 1]]
+        n1.append(np.minimum(a, b).ravel())
+        n2.append(np.maximum(a, b).ravel())
+        elems.append(np.repeat(block.elem_index, len(local)))
+
+    if not elems:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+
+    n1, n2, elems = np.concatenate(n1), np.concatenate(n2), np.concatenate(elems)
+    keep = n1 != n2    # collapsed edges
+    return n1[keep], n2[keep], elems[keep]
+
+
+def build_adjacency(mesh, mode=EDGE):
+    """
+    Builds element adjacency in one sorted pass: entities (edges or nodes)
+    are sorted, and every pair of elements within one entity group becomes
+    a neighbor pair.
+    """
+    num_elements = mesh.num_elements
+
+    if mode == EDGE:
+        n1, n2, elems = edge_table(mesh)
+        keys = n1 * max(mesh.num_nodes, 1) + n2
+    elif mode == NODE:
+        keys = np.concatenate(
+            [b.conn.ravel() for b in mesh.blocks.values()] or [np.zeros(0, np.int64)]
+        )
+        elems = np.concatenate(
+            [np.repeat(b.elem_index, b.nodes_per_element) for b in mesh.blocks.values()]
+            or [np.zeros(0, np.int64)]
+        )
+    else:
+        raise ValueError(f"Unknown adjacency mode: {mode}")
+
+    src, dst = _group_pairs(keys, elems)
+
+    pair = np.sort(src * num_elements + dst)
+    pair = pair[np.r_[True, pair[1:] != pair[:-1]]] if len(pair) else pair
+    src, dst = pair // max(num_elements, 1), pair % max(num_elements, 1)
+
+    offsets = np.zeros(num_elements + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_elements), out=offsets[1:])
+
+    return ElementAdjacency(mesh.elem_ids, offsets, dst.astype(np.int64), mode)
+
+
+def _group_pairs(keys, elems):
+    """All ordered (a, b), a != b, of elements sharing a key."""
+    order = np.lexsort((elems, keys))
+    keys, elems = keys[order], elems[order]
+
+    # An element listing the same node/edge twice counts once
+    dup = np.zeros(len(keys), dtype=bool)
+    dup[1:] = (keys[1:] == keys[:-1]) & (elems[1:] == elems[:-1])
+    keys, elems = keys[~dup], elems[~dup]
+
+    if len(keys) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+
+    shared = sizes > 1
+    starts, sizes = starts[shared], sizes[shared]
+    entry_start = np.repeat(starts, sizes)
+    entry_size = np.repeat(sizes, sizes)
+    entries = entry_start + (np.arange(len(entry_start)) - np.repeat(
+        np.cumsum(sizes) - sizes, sizes
+    ))
+
+    # Entry e pairs with every entry of its group
+    src = np.repeat(elems[entries], entry_size)
+    first = np.repeat(entry_start, entry_size)
+    within = np.arange(len(src)) - np.repeat(
+        np.cumsum(entry_size) - entry_size, entry_size
+    )
+    dst = elems[first + within]
+
+    keep = src != dst
+    return src[keep], dst[keep]
+
+
+def build_element_neighbors(mesh, mode=NODE):
+    """
+    Element neighbors as an ElementAdjacency (elem_id -> set of elem_ids).
+    Defaults to the original node-sharing definition; pass mode=EDGE to
+    ignore corner contact.
+    """
+    return build_adjacency(mesh, mode)
+
+
+def neighbor_counts(neighbors):
+    """elem_id -> neighbor count for an ElementAdjacency or a plain dict of sets."""
+    if isinstance(neighbors, ElementAdjacency):
+        return dict(zip(neighbors.elem_ids.tolist(), neighbors.counts().tolist()))
+    return {elem_id: len(n) for elem_id, n in neighbors.items()}
+
+
+def neighbor_count_array(neighbors, elem_ids):
+    """Neighbor counts in `elem_ids` order; an aligned ElementAdjacency is read directly."""
+    if isinstance(neighbors, ElementAdjacency) and np.array_equal(neighbors.elem_ids, elem_ids):
+        return neighbors.counts()
+
+    counts = neighbor_counts(neighbors)
+    return np.array([counts.get(eid, 0) for eid in elem_ids.tolist()], dtype=np.int64)
+
+
+def adjacency_matrix(neighbors, elem_ids):
+    """
+    Neighbor graph as an (E, E) CSR matrix over `elem_ids` positions, from
+    an ElementAdjacency (read directly when aligned) or a dict of sets.
+    """
+    if isinstance(neighbors, ElementAdjacency) and np.array_equal(neighbors.elem_ids, elem_ids):
+        return neighbors.to_sparse()
+
+    index = {eid: pos for pos, eid in enumerate(np.asarray(elem_ids).tolist())}
+    rows, cols = [], []
+    for eid, nbrs in neighbors.items():
+        if eid not in index:
+            continue
+        for nb in nbrs:
+            if nb in index:
+                rows.append(index[eid])
+                cols.append(index[nb])
+
+    n = len(index)
+    return sparse.csr_matrix(
+        (np.ones(len(rows)), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+        shape=(n, n)
+    )
+
+
+def surface_faces(mesh):
+    """
+    Faces visible from outside: every shell element, plus solid faces that
+    belong to exactly one solid. Returns {corners: (faces, owner)} with
+    faces (f, corners) node positions and owner (f,) element positions.
+    """
+    grouped = {}
+
+    for block in mesh.blocks.values():
+        etype = element_type(block.elem_type)
+        for face in etype.faces:
+            if len(face) < 3:
+                continue
+            faces = block.conn[:, list(face)]
+            entry = grouped.setdefault(len(face), ([], [], []))
+            entry[0].append(faces)
+            entry[1].append(block.elem_index)
+            entry[2].append(np.full(len(block), etype.dim == 3))
+
+    result = {}
+    for corners, (faces, owner, solid) in grouped.items():
+        faces = np.concatenate(faces)
+        owner = np.concatenate(owner)
+        solid = np.concatenate(solid)
+
+        keep = ~solid
+        if solid.any():
+            keep |= solid & _single_use(faces, solid)
+        result[corners] = (faces[keep], owner[keep])
+
+    return result
+
+
+def _single_use(faces, solid):
+    """True for solid faces whose node set appears on no other solid face."""
+    key = np.sort(faces[solid], axis=1)
+    order = np.lexsort(key.T[::-1])
+    key = key[order]
+
+    new = np.r_[True, (key[1:] != key[:-1]).any(axis=1)]
+    group = np.cumsum(new) - 1
+    single = (np.bincount(group) == 1)[group]
+
+    out = np.zeros(len(faces), dtype=bool)
+    idx = np.flatnonzero(solid)
+    out[idx[order]] = single
+    return out
+
+
+def surface_triangles(mesh):
+    """Fan-triangulated surface faces: tris (t, 3) node positions, owner (t,)."""
+    tris, owner = [], []
+    for corners, (faces, elems) in surface_faces(mesh).items():
+        for i in range(1, corners - 1):
+            tris.append(faces[:, [0, i, i + 1]])
+            owner.append(elems)
+
+    if not tris:
+        return np.zeros((0, 3), dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(tris), np.concatenate(owner)
+
+
+def surface_edges(mesh):
+    """Unique (n1, n2) node position pairs along the surface faces."""
+    pairs = []
+    for corners, (faces, _) in surface_faces(mesh).items():
+        a = faces
+        b = np.roll(faces, -1, axis=1)
+        pairs.append(np.stack([np.minimum(a, b).ravel(), np.maximum(a, b).ravel()], axis=1))
+
+    return _unique_pairs(pairs)
+
+
+def element_edges(mesh, positions=None):
+    """
+    Unique (n1, n2) node position pairs along the corner edges of the
+    elements at `positions` (default: all): polygon sides for shells,
+    the edges of the element type for solids.
+    """
+    selected = np.ones(mesh.num_elements, dtype=bool)
+    if positions is not None:
+        selected[:] = False
+        selected[positions] = True
+
+    pairs = []
+    for block in mesh.blocks.values():
+        local = element_type(block.elem_type).edges
+        rows = np.flatnonzero(selected[block.elem_index])
+        if len(local) == 0 or len(rows) == 0:
+            continue
+        a = block.conn[rows][:, local[:, 0]]
+        b = block.conn[rows][:, local[:, 1]]
+        pairs.append(np.stack([np.minimum(a, b).ravel(), np.maximum(a, b).ravel()], axis=1))
+    return _unique_pairs(pairs)
+
+
+def _unique_pairs(pairs):
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.concatenate(pairs)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+    pairs = pairs[order]
+    return pairs[np.r_[True, (pairs[1:] != pairs[:-1]).any(axis=1)]] if len(pairs) else pairs
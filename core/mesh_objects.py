@@ -1,3 +1,10 @@
+from collections.abc import ItemsView, Mapping, ValuesView
+
+import numpy as np
+
+from .element_types import resolve_element_type
+
+
 class Node:
     def __init__(self, node_id, x, y, z):
         self.id = int(node_id)
@@ -10,12 +17,332 @@ class Node:
 
 
 class Element:
-    def __init__(self, elem_id, node_ids):
+    def __init__(self, elem_id, node_ids, elem_type=None):
         self.id = int(elem_id)
         self.node_ids = [int(nid) for nid in node_ids]
+        self.elem_type = elem_type
+
+
+class ElementBlock:
+    """
+    All elements of one type.
+        elem_index: (m,) positions into Mesh.elem_ids
+        conn:       (m, k) positions into Mesh.coords
+    """
+
+    def __init__(self, elem_type, elem_index, conn):
+        self.elem_type = elem_type
+        self.elem_index = np.asarray(elem_index, dtype=np.int64)
+        self.conn = np.asarray(conn, dtype=np.int64)
+        if self.conn.ndim != 2:
+            self.conn = self.conn.reshape(len(self.elem_index), -1 if len(self) else 0)
+
+    @property
+    def nodes_per_element(self):
+        return self.conn.shape[1]
+
+    def __len__(self):
+        return len(self.elem_index)
 
 
 class Mesh:
-    def __init__(self):
-        self.nodes = {}      # node_id -> Node
-        self.elements = {}   # elem_id -> Element
+    """
+    Struct-of-arrays mesh.
+
+        node_ids:   (N,) int64 node ids, file order
+        coords:     (N, 3) float coordinates, row i belongs to node_ids[i]
+        elem_ids:   (E,) int64 element ids, file order
+        elem_types: (E,) element type labels
+        blocks:     elem_type -> ElementBlock
+
+    `nodes` and `elements` are read-only dict views that build Node and
+    Element objects on access, so existing per-object code keeps working.
+    """
+
+    def __init__(self, node_ids=None, coords=None, elem_ids=None, blocks=None,
+                 elem_types=None, dtype=np.float64, elem_block=None, elem_row=None):
+        self.node_ids = np.asarray(
+            node_ids if node_ids is not None else [], dtype=np.int64
+        )
+        self.coords = np.ascontiguousarray(
+            coords if coords is not None else np.empty((0, 3)), dtype=dtype
+        ).reshape(-1, 3)
+        self.elem_ids = np.asarray(
+            elem_ids if elem_ids is not None else [], dtype=np.int64
+        )
+        self.blocks = dict(blocks or {})
+        self._block_list = list(self.blocks.values())
+
+        if elem_block is None or elem_row is None:
+            num_elements = len(self.elem_ids)
+            elem_block = np.full(num_elements, -1, dtype=np.int16)
+            elem_row = np.zeros(num_elements, dtype=np.int64)
+            for code, block in enumerate(self._block_list):
+                elem_block[block.elem_index] = code
+                elem_row[block.elem_index] = np.arange(len(block))
+        self.elem_block = elem_block    # position -> index into blocks
+        self.elem_row = elem_row        # position -> row within its block
+
+        if elem_types is None:
+            names = np.array(list(self.blocks) or [""], dtype=str)
+            elem_types = names[np.maximum(self.elem_block, 0)]
+        self.elem_types = np.asarray(elem_types, dtype=str)
+
+        self._node_index = None
+        self._elem_index = None
+        self._node_order = None
+        self._elem_order = None
+        self._spatial_index = None
+        self._geometry = None
+        self._topology = None
+
+        self.nodes = NodeView(self)          # node_id -> Node
+        self.elements = ElementView(self)    # elem_id -> Element
+
+    @classmethod
+    def from_connectivity(cls, node_ids, coords, elem_ids, conn, num_nodes,
+                          elem_types=None, dtype=np.float64):
+        """
+        Builds a mesh from a padded (E, W) array of node ids where only the
+        first num_nodes[e] entries of row e are used. Elements are grouped
+        into blocks by the type resolved from their label and node count.
+        """
+        mesh = cls(node_ids, coords, dtype=dtype)
+        elem_ids = np.asarray(elem_ids, dtype=np.int64)
+        conn = np.asarray(conn).reshape(len(elem_ids), -1 if len(elem_ids) else 0)
+        num_nodes = np.asarray(num_nodes, dtype=np.int64)
+
+        labels = np.asarray(
+            elem_types if elem_types is not None else [""] * len(elem_ids), dtype=str
+        )
+        names, label_code = np.unique(labels, return_inverse=True)
+        width = int(num_nodes.max(initial=0)) + 1
+        combo = label_code.ravel() * width + num_nodes
+
+        # Resolve each distinct (label, node count) once
+        type_of = {}
+        for c in np.unique(combo).tolist():
+            type_of.setdefault(
+                resolve_element_type(names[c // width], c % width), []
+            ).append(c)
+
+        blocks = {}
+        for name, combos in type_of.items():
+            sel = np.flatnonzero(np.isin(combo, combos))
+            k = int(num_nodes[sel[0]])
+            block_conn = mesh.node_positions(conn[sel, :k].astype(np.int64))
+            blocks[name] = ElementBlock(name, sel, block_conn)
+
+        return cls(mesh.node_ids, mesh.coords, elem_ids, blocks,
+                   elem_types=elem_types, dtype=dtype)
+
+    @classmethod
+    def from_objects(cls, nodes, elements, dtype=np.float64):
+        """Builds a mesh from iterables of Node and Element objects."""
+        nodes = list(nodes)
+        elements = list(elements)
+
+        node_ids = [n.id for n in nodes]
+        coords = [n.coords() for n in nodes]
+
+        width = max((len(e.node_ids) for e in elements), default=0)
+        conn = np.zeros((len(elements), width), dtype=np.int64)
+        num_nodes = np.zeros(len(elements), dtype=np.int64)
+        for row, element in enumerate(elements):
+            conn[row, :len(element.node_ids)] = element.node_ids
+            num_nodes[row] = len(element.node_ids)
+
+        elem_types = None
+        if elements and all(e.elem_type is not None for e in elements):
+            elem_types = [e.elem_type for e in elements]
+
+        return cls.from_connectivity(
+            node_ids, coords, [e.id for e in elements], conn, num_nodes,
+            elem_types=elem_types, dtype=dtype
+        )
+
+    def select_elements(self, positions):
+        """
+        Returns a mesh holding only the elements at `positions`, in that
+        order. Nodes are shared; only the selected connectivity rows are read.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        codes = self.elem_block[positions]
+        rows = self.elem_row[positions]
+
+        blocks = {}
+        for code, block in enumerate(self._block_list):
+            sel = np.flatnonzero(codes == code)
+            if len(sel):
+                blocks[block.elem_type] = ElementBlock(
+                    block.elem_type, sel, block.conn[rows[sel]]
+                )
+
+        mesh = Mesh(self.node_ids, self.coords, self.elem_ids[positions], blocks,
+                    elem_types=self.elem_types[positions], dtype=self.coords.dtype)
+        mesh._node_index = self._node_index
+        mesh._node_order = self._node_order
+        return mesh
+
+    # ------------------------------------------------------------
+    # id -> index lookups
+    # ------------------------------------------------------------
+
+    @property
+    def node_index(self):
+        if self._node_index is None:
+            self._node_index = dict(
+                zip(self.node_ids.tolist(), range(len(self.node_ids)))
+            )
+        return self._node_index
+
+    @property
+    def elem_index(self):
+        if self._elem_index is None:
+            self._elem_index = dict(
+                zip(self.elem_ids.tolist(), range(len(self.elem_ids)))
+            )
+        return self._elem_index
+
+    def node_positions(self, node_ids):
+        """Vectorized node id -> row in coords. Raises KeyError on unknown ids."""
+        if self._node_order is None:
+            self._node_order = np.argsort(self.node_ids, kind="stable")
+        return _lookup(self.node_ids, self._node_order, node_ids, "node")
+
+    def element_positions(self, elem_ids):
+        """Vectorized element id -> position in elem_ids."""
+        if self._elem_order is None:
+            self._elem_order = np.argsort(self.elem_ids, kind="stable")
+        return _lookup(self.elem_ids, self._elem_order, elem_ids, "element")
+
+    # ------------------------------------------------------------
+    # Per-element helpers
+    # ------------------------------------------------------------
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_elements(self):
+        return len(self.elem_ids)
+
+    def nodes_per_element(self):
+        counts = np.array(
+            [b.nodes_per_element for b in self._block_list] or [0],
+            dtype=np.int64
+        )
+        return counts[np.maximum(self.elem_block, 0)]
+
+    def element_node_positions(self, pos):
+        block = self._block_list[self.elem_block[pos]]
+        return block.conn[self.elem_row[pos]]
+
+
+def _lookup(ids, order, query, kind):
+    query = np.asarray(query, dtype=np.int64)
+    if len(ids) == 0:
+        if query.size:
+            raise KeyError(f"Unknown {kind} id {int(query.flat[0])}")
+        return np.zeros(query.shape, dtype=np.int64)
+
+    pos = np.searchsorted(ids, query, sorter=order)
+    idx = order[np.minimum(pos, len(ids) - 1)]
+    missing = ids[idx] != query
+    if missing.any():
+        raise KeyError(f"Unknown {kind} id {int(query[missing].flat[0])}")
+    return idx
+
+
+# ----------------------------------------------------------------
+# Object views
+# ----------------------------------------------------------------
+
+class NodeView(Mapping):
+    def __init__(self, mesh):
+        self._mesh = mesh
+
+    def __getitem__(self, node_id):
+        idx = self._mesh.node_index[node_id]
+        x, y, z = self._mesh.coords[idx]
+        return Node(node_id, x, y, z)
+
+    def __contains__(self, node_id):
+        return node_id in self._mesh.node_index
+
+    def __iter__(self):
+        return iter(self._mesh.node_ids.tolist())
+
+    def __len__(self):
+        return len(self._mesh.node_ids)
+
+    def values(self):
+        return _NodeValues(self)
+
+    def items(self):
+        return _NodeItems(self)
+
+
+class _NodeValues(ValuesView):
+    def __iter__(self):
+        for _, node in _iter_nodes(self._mapping._mesh):
+            yield node
+
+
+class _NodeItems(ItemsView):
+    def __iter__(self):
+        return _iter_nodes(self._mapping._mesh)
+
+
+def _iter_nodes(mesh):
+    for nid, (x, y, z) in zip(mesh.node_ids.tolist(), mesh.coords.tolist()):
+        yield nid, Node(nid, x, y, z)
+
+
+class ElementView(Mapping):
+    def __init__(self, mesh):
+        self._mesh = mesh
+
+    def __getitem__(self, elem_id):
+        mesh = self._mesh
+        pos = mesh.elem_index[elem_id]
+        node_ids = mesh.node_ids[mesh.element_node_positions(pos)]
+        return Element(elem_id, node_ids.tolist(), str(mesh.elem_types[pos]))
+
+    def __contains__(self, elem_id):
+        return elem_id in self._mesh.elem_index
+
+    def __iter__(self):
+        return iter(self._mesh.elem_ids.tolist())
+
+    def __len__(self):
+        return len(self._mesh.elem_ids)
+
+    def values(self):
+        return _ElementValues(self)
+
+    def items(self):
+        return _ElementItems(self)
+
+
+class _ElementValues(ValuesView):
+    def __iter__(self):
+        for _, element in _iter_elements(self._mapping._mesh):
+            yield element
+
+
+class _ElementItems(ItemsView):
+    def __iter__(self):
+        return _iter_elements(self._mapping._mesh)
+
+
+def _iter_elements(mesh):
+    rows = [
+        mesh.node_ids[block.conn].tolist() for block in mesh._block_list
+    ]
+    elem_types = mesh.elem_types.tolist()
+    for pos, (eid, code, row) in enumerate(zip(
+        mesh.elem_ids.tolist(), mesh.elem_block.tolist(), mesh.elem_row.tolist()
+    )):
+        yield eid, Element(eid, rows[code][row], elem_types[pos])
@@ -0,0 +1,169 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .element_types import element_type
+
+
+class SpatialIndex:
+    """
+    Geometric queries over one mesh: cached element centroids and
+    bounding boxes, and KD-trees over centroids and nodes built on first
+    use. Get it with spatial_index(mesh), which caches it on the mesh.
+
+    Queries take one point (3,) or many (P, 3) and answer in bulk; element
+    results are positions into mesh.elem_ids, node results into
+    mesh.node_ids.
+    """
+
+    def __init__(self, mesh):
+        self.mesh = mesh
+        self.centroids = element_centroids(mesh)
+        self.lower, self.upper = element_bounds(mesh)
+        self._element_tree = None
+        self._node_tree = None
+
+    @property
+    def element_tree(self):
+        if self._element_tree is None:
+            self._element_tree = cKDTree(self.centroids)
+        return self._element_tree
+
+    @property
+    def node_tree(self):
+        if self._node_tree is None:
+            self._node_tree = cKDTree(self.mesh.coords)
+        return self._node_tree
+
+    @property
+    def max_radius(self):
+        """Largest distance from a centroid to its element's box corner."""
+        if len(self.centroids) == 0:
+            return 0.0
+        reach = np.maximum(self.upper - self.centroids, self.centroids - self.lower)
+        return float(np.linalg.norm(reach, axis=1).max())
+
+    # ------------------------------------------------------------
+    # Elements
+    # ------------------------------------------------------------
+
+    def nearest_elements(self, points, k=1):
+        """(dist, pos) of the k elements with the nearest centroids, as cKDTree.query."""
+        return _query(self.element_tree, points, k)
+
+    def elements_within(self, points, radius):
+        """Elements whose centroid lies within `radius`: an array per point."""
+        return self.element_tree.query_ball_point(
+            points, radius, workers=-1, return_sorted=True
+        )
+
+    def elements_in_box(self, lower, upper, overlap=False):
+        """
+        Elements with their centroid inside the box, or with overlap=True,
+        whose bounding box intersects it. One vectorized pass over all
+        elements.
+        """
+        lower, upper = np.asarray(lower), np.asarray(upper)
+        if overlap:
+            mask = (self.lower <= upper).all(axis=1) & (self.upper >= lower).all(axis=1)
+        else:
+            mask = ((self.centroids >= lower) & (self.centroids <= upper)).all(axis=1)
+        return np.flatnonzero(mask)
+
+    def elements_in_boxes(self, lowers, uppers, overlap=False):
+        """
+        elements_in_box for many (B, 3) boxes at once: candidates come from
+        one bulk ball query around the box centers, then are tested exactly.
+        Returns an array per box.
+        """
+        lowers, uppers = np.atleast_2d(lowers), np.atleast_2d(uppers)
+        centers = 0.5 * (lowers + uppers)
+        radii = 0.5 * np.linalg.norm(uppers - lowers, axis=1)
+        if overlap:
+            radii = radii + self.max_radius
+
+        out = []
+        for cand, lo, hi in zip(
+            self.element_tree.query_ball_point(centers, radii, workers=-1), lowers, uppers
+        ):
+            cand = np.asarray(cand, dtype=np.int64)
+            if overlap:
+                keep = (self.lower[cand] <= hi).all(axis=1) & (self.upper[cand] >= lo).all(axis=1)
+            else:
+                c = self.centroids[cand]
+                keep = ((c >= lo) & (c <= hi)).all(axis=1)
+            out.append(np.sort(cand[keep]))
+        return out
+
+    # ------------------------------------------------------------
+    # Nodes
+    # ------------------------------------------------------------
+
+    def nearest_nodes(self, points, k=1):
+        return _query(self.node_tree, points, k)
+
+    def nodes_within(self, points, radius):
+        return self.node_tree.query_ball_point(
+            points, radius, workers=-1, return_sorted=True
+        )
+
+
+def spatial_index(mesh):
+    """The mesh's SpatialIndex, built on first use and kept on the mesh."""
+    if getattr(mesh, "_spatial_index", None) is None:
+        mesh._spatial_index = SpatialIndex(mesh)
+    return mesh._spatial_index
+
+
+def element_centroids(mesh):
+    """(E, 3) centroid (mean of corner nodes) of every element."""
+    out = np.zeros((mesh.num_elements, 3))
+    for block in mesh.blocks.values():
+        corners = element_type(block.elem_type).corners or block.nodes_per_element
+        out[block.elem_index] = mesh.coords[block.conn[:, :corners]].mean(axis=1)
+    return out
+
+
+def element_bounds(mesh):
+    """(E, 3) lower and (E, 3) upper bounding-box corners of every element."""
+    lo = np.zeros((mesh.num_elements, 3))
+    hi = np.zeros((mesh.num_elements, 3))
+    for block in mesh.blocks.values():
+        p = mesh.coords[block.conn]
+        lo[block.elem_index] = p.min(axis=1)
+        hi[block.elem_index] = p.max(axis=1)
+    return lo, hi
+
+
+def box_overlap(lo_a, hi_a, lo_b, hi_b):
+    """
+    Per-pair overlap score in [0, 1]: the product over axes of
+    intersection / union extent. Axes along which both boxes are flat
+    (shells in a coordinate plane) count as full overlap.
+    """
+    inter = np.minimum(hi_a, hi_b) - np.maximum(lo_a, lo_b)
+    union = np.maximum(hi_a, hi_b) - np.minimum(lo_a, lo_b)
+    flat = union <= 1e-12 * (1.0 + np.abs(union).max(initial=0.0))
+    ratio = np.where(flat, 1.0, np.clip(inter, 0.0, None) / np.where(flat, 1.0, union))
+    return ratio.prod(axis=-1)
+
+
+def locality_order(points, cells=64):
+    """Permutation sorting points by grid cell, for cache-local bulk queries."""
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.int64)
+    lo = points.min(axis=0)
+    span = np.maximum(points.max(axis=0) - lo, 1e-12)
+    c = np.minimum((points - lo) / span * cells, cells - 1).astype(np.int64)
+    return np.lexsort((c[:, 2], c[:, 1], c[:, 0]))
+
+
+def _query(tree, points, k):
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim == 1:
+        return tree.query(points, k=k)
+
+    order = locality_order(points)
+    dist, pos = tree.query(points[order], k=k, workers=-1)
+    out_dist, out_pos = np.empty_like(dist), np.empty_like(pos)
+    out_dist[order], out_pos[order] = dist, pos
+    return out_dist, out_pos
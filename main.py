@@ -1,77 +1,321 @@
+import argparse
+
+import numpy as np
+
+import core.element_types
+import core.mesh_loader
+import core.mesh_neighbors
+import core.mesh_objects
+import core.spatial_index
+import quality.mesh_checks
+import quality.metrics
+import quality.rules
+import quality.topology
+import ai.feature_builder
+import ai.hybrid_risk
+import ai.rf_model
+import ai.risk_model
+import ai.sampling
+
+from core.artifact_cache import (
+    DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ArtifactCache, cached_stage, store_stage
+)
+from core.element_table import ElementValues
+from core.mesh_cache import file_hash
 from core.mesh_loader import load_mesh
-from core.mesh_neighbors import build_element_neighbors
-from quality.metrics import compute_quality_metrics
-from quality.rules import detect_mesh_errors
+from core.mesh_neighbors import build_adjacency, ElementAdjacency, EDGE
+from quality.metrics import compute_quality_metrics, QualityMetrics
+from quality.mesh_checks import topology_checks
+from quality.rules import DEFAULT_RULES_PATH, detect_mesh_errors, load_rules, MeshErrors
 
-from ai.feature_builder import build_feature_matrix
+from ai.feature_builder import (
+    build_feature_matrix, ERROR_RING, FEATURE_SCHEMA_VERSION, FeatureMatrix
+)
 from ai.risk_model import compute_risk_scores
-from ai.rf_model import train_rf_model, predict_failure_probability
+from ai.rf_model import (
+    error_labels, fit_rf_model, train_rf_model, train_rf_streaming,
+    predict_failure_probability
+)
+from ai.feature_store import FeatureStore
+from ai.model_store import DEFAULT_MODEL_DIR, LazyModel, ModelStore
+from ai.sampling import SAMPLE_SEED, TRAIN_SAMPLE_CAP, StratifiedReservoir
 from ai.hybrid_risk import compute_hybrid_risk, hybrid_category
 
+from analysis.compare_meshes import region_deltas
+from analysis.incremental import MeshAnalysis, update_analysis
+from analysis.scorecard import component_summary
+
+from visualization.glb_export import export_risk_glb
 from visualization.hybrid_comparison_3d import plot_side_by_side
 from visualization.mesh_error_debug_3d import plot_mesh_errors_3d
 
 
-def analyze_mesh(node_csv, elem_csv):
+MESHES = {
+    "first": ("data/first_mesh/first_mesh_2_NODE.csv",
+              "data/first_mesh/first_mesh_2_ELEMENT.csv"),
+    "final": ("data/final_mesh/final_mesh_NODE.csv",
+              "data/final_mesh/final_mesh_ELEMENT.csv"),
+}
+
+
+# Modules whose source versions the cached artifacts of each stage
+MESH_CODE = [core.mesh_loader, core.mesh_objects, core.element_types]
+STAGE_CODE = {
+    "neighbors": MESH_CODE + [core.mesh_neighbors],
+    "metrics": MESH_CODE + [quality.metrics],
+    "errors": MESH_CODE + [core.spatial_index, quality.rules, quality.mesh_checks,
+               quality.topology],
+    "features": [ai.feature_builder],
+    "rule_risk": [ai.risk_model],
+    "ml_prob": [ai.rf_model, ai.sampling],
+    "hybrid_risk": [ai.hybrid_risk],
+}
+
+
+def input_key(node_csv, elem_csv):
+    return f"{file_hash(node_csv)}:{file_hash(elem_csv)}"
+
+
+def model_identity(model):
+    """
+    Cache identity of the ML stage's model, or None if it can't be cached.
+    Stored models are identified by content too: a store wiped and
+    retrained hands out the same version numbers again.
+    """
+    if model is None:
+        return {"per_mesh": True}
+    if isinstance(model, LazyModel):
+        return {"store": model.store.root, "name": model.name, "version": model.version,
+                "model_hash": file_hash(model.store.model_path(model.name, model.version))}
+    return None
+
+
+def stage_keys(cache, node_csv, elem_csv, model=None):
+    """
+    Artifact cache key of every stage for these inputs. Stages that can't
+    be cached (no cache, or an unidentifiable model for the ML stages)
+    map to None.
+    """
+    keys = dict.fromkeys(STAGE_CODE)
+    if cache is None:
+        return keys
+
+    def key(name, deps, params=None):
+        keys[name] = cache.key(name, deps, params, STAGE_CODE[name])
+
+    inputs = [input_key(node_csv, elem_csv)]
+    key("neighbors", inputs, {"mode": EDGE})
+    key("metrics", inputs)
+    key("errors", [keys["metrics"], keys["neighbors"], file_hash(DEFAULT_RULES_PATH)])
+    key("features", [keys["metrics"], keys["neighbors"], keys["errors"]],
+        {"schema": FEATURE_SCHEMA_VERSION, "ring": ERROR_RING})
+    key("rule_risk", [keys["features"]])
+
+    identity = model_identity(model)
+    if identity is not None:
+        key("ml_prob", [keys["features"]], identity)
+        key("hybrid_risk", [keys["rule_risk"], keys["ml_prob"]])
+    return keys
+
+
+def _feature_stages(node_csv, elem_csv, keys, cache=None):
+    """
+    Load -> adjacency -> metrics -> rule errors -> feature matrix, each
+    stage memoized in `cache` under `keys` when given.
+    """
+    mesh = load_mesh(node_csv, elem_csv)
+
+    neighbors = cached_stage(cache, keys["neighbors"], ElementAdjacency,
+                             lambda: build_adjacency(mesh, mode=EDGE))
+    metrics = cached_stage(cache, keys["metrics"], QualityMetrics,
+                           lambda: compute_quality_metrics(mesh))
+    errors = cached_stage(cache, keys["errors"], MeshErrors,
+                          lambda: detect_mesh_errors(metrics, neighbors, mesh=mesh))
+    features = cached_stage(cache, keys["features"], FeatureMatrix,
+                            lambda: build_feature_matrix(metrics, neighbors, errors))
+
+    return mesh, neighbors, metrics, errors, features
+
+
+def mesh_features(node_csv, elem_csv, cache=None):
+    """Load -> adjacency -> metrics -> rule errors -> feature matrix."""
+    keys = stage_keys(cache, node_csv, elem_csv)
+    mesh, _, _, errors, features = _feature_stages(node_csv, elem_csv, keys, cache)
+    return mesh, errors, features
+
+
+def run_analysis(node_csv, elem_csv, model=None, store=None, cache=None,
+                 previous=None):
+    """
+    Full pipeline as a MeshAnalysis (see analyze_mesh). With `previous`,
+    a MeshAnalysis of an earlier version of this mesh, only the elements
+    that changed and their neighborhood are recomputed; the patched
+    results are stored in `cache` like a full run's.
+    """
+    keys = stage_keys(cache, node_csv, elem_csv, model)
+
+    # A fully cached run beats patching
+    if previous is not None and cache is not None and keys["hybrid_risk"] is not None \
+            and cache.get(keys["hybrid_risk"]) is not None:
+        previous = None
+
+    if previous is not None:
+        analysis, stats = update_analysis(previous, load_mesh(node_csv, elem_csv), model)
+        print(f"Incremental: {stats['changed']} of {stats['elements']} elements changed, "
+              f"{stats['removed']} old elements replaced or deleted, "
+              f"{stats['recomputed']} rescored")
+
+        for name, table in [("neighbors", analysis.neighbors),
+                            ("metrics", analysis.metrics),
+                            ("errors", analysis.errors),
+                            ("features", analysis.features),
+                            ("rule_risk", analysis.rule_risks)]:
+            store_stage(cache, keys[name], table)
+        if model is not None:
+            store_stage(cache, keys["ml_prob"], analysis.ml_probs)
+            store_stage(cache, keys["hybrid_risk"], analysis.hybrid_risks)
+    else:
+        mesh, neighbors, metrics, errors, features = _feature_stages(
+            node_csv, elem_csv, keys, cache
+        )
+        rule_risks = cached_stage(cache, keys["rule_risk"], ElementValues,
+                                  lambda: compute_risk_scores(features))
+
+        rf_model = model
+
+        def ml_stage():
+            nonlocal rf_model
+            if rf_model is None:
+                rf_model = train_rf_model(features, errors)
+            return predict_failure_probability(rf_model, features)
+
+        ml_probs = cached_stage(cache, keys["ml_prob"], ElementValues, ml_stage)
+        hybrid_risks = cached_stage(cache, keys["hybrid_risk"], ElementValues,
+                                    lambda: compute_hybrid_risk(rule_risks, ml_probs))
+
+        analysis = MeshAnalysis(mesh, neighbors, metrics, errors, features,
+                                rule_risks, ml_probs, hybrid_risks, rf_model)
+
+    if store is not None:
+        store.append(
+            analysis.features, error_labels(analysis.features, analysis.errors),
+            key=input_key(node_csv, elem_csv),
+            source={"nodes": node_csv, "elements": elem_csv},
+        )
+
+    return analysis
+
+
+def analyze_mesh(node_csv, elem_csv, model=None, store=None, cache=None):
     """
     Runs full mesh analysis pipeline.
+    With a trained `model` (e.g. from the model store) it is inference
+    only; without one an RF is trained on this mesh as before.
+    With a FeatureStore `store` the features and labels are appended to it.
+    With an ArtifactCache `cache` every stage is reused when its inputs,
+    parameters and code are unchanged.
     Returns:
         mesh object
         errors (rule-based)
         hybrid_risks (final AI risk)
     """
 
-    mesh = load_mesh(node_csv, elem_csv)
+    analysis = run_analysis(node_csv, elem_csv, model, store, cache)
+
+    return analysis.mesh, analysis.errors, analysis.hybrid_risks
 
-    neighbors = build_element_neighbors(mesh)
 
-    metrics = compute_quality_metrics(mesh)
+def train(model_dir=DEFAULT_MODEL_DIR, meshes=MESHES,
+          max_samples=TRAIN_SAMPLE_CAP, seed=SAMPLE_SEED, cache=None):
+    """
+    Trains the RF on a stratified sample of at most `max_samples` elements
+    drawn across all `meshes`, and saves it to the store.
+    """
+    reservoir = StratifiedReservoir(max_samples, seed)
+    for name, (node_csv, elem_csv) in meshes.items():
+        print(f"\n=== COLLECTING TRAINING DATA: {name.upper()} MESH ===")
+        _, errors, features = mesh_features(node_csv, elem_csv, cache)
+        reservoir.add(features.X, error_labels(features, errors))
 
-    errors = detect_mesh_errors(metrics, neighbors)
+    X, y = reservoir.sample()
+    model = fit_rf_model(X, y)
 
-    features = build_feature_matrix(metrics, neighbors, errors)
+    version = ModelStore(model_dir).save(model, "rf", {
+        "meshes": {name: list(paths) for name, paths in meshes.items()},
+        "n_samples": int(len(y)),
+        "n_positive": int(y.sum()),
+        "sampling": reservoir.info(),
+        "params": {
+            k: v for k, v in model.get_params().items()
+            if isinstance(v, (int, float, str, bool, type(None)))
+        },
+    })
+    print(f"\nSaved rf v{version} to {model_dir}")
+    return version
 
-    rule_risks = compute_risk_scores(features)
 
-    rf_model = train_rf_model(features, errors)
+def train_from_store(store_dir, model_dir=DEFAULT_MODEL_DIR, seed=SAMPLE_SEED):
+    """Streams the whole feature store through a warm-start RF and saves it."""
+    store = FeatureStore(store_dir)
+    model = train_rf_streaming(store, seed=seed)
 
-    ml_probs = predict_failure_probability(rf_model, features)
+    version = ModelStore(model_dir).save(model, "rf", {
+        "feature_store": store_dir,
+        "n_meshes": len(store.manifest["meshes"]),
+        "n_samples": len(store),
+        "n_positive": int(store.column("label").sum()),
+        "seed": seed,
+        "n_estimators": model.n_estimators,
+    })
+    print(f"\nSaved rf v{version} to {model_dir}")
+    return version
 
-    hybrid_risks = compute_hybrid_risk(rule_risks, ml_probs)
 
-    return mesh, errors, hybrid_risks
+def analyze(model_dir=DEFAULT_MODEL_DIR, store_dir=None, cache=None,
+            incremental=False):
 
+    model = ModelStore(model_dir).lazy("rf")
+    if model is None:
+        print(f"No stored RF model in {model_dir} (run `python main.py train`);"
+              " training per mesh instead.")
+    else:
+        print(f"Using stored RF model v{model.version}")
 
-def main():
+    store = FeatureStore(store_dir) if store_dir else None
 
     print("\n=== RUNNING FIRST MESH ANALYSIS ===")
 
-    first_mesh, first_errors, first_risks = analyze_mesh(
-        "data/first_mesh/first_mesh_2_NODE.csv",
-        "data/first_mesh/first_mesh_2_ELEMENT.csv"
-    )
+    first = run_analysis(*MESHES["first"], model=model, store=store, cache=cache)
+    first_mesh, first_errors, first_risks = first.mesh, first.errors, first.hybrid_risks
 
     print("\n=== RUNNING FINAL MESH ANALYSIS ===")
 
-    final_mesh, final_errors, final_risks = analyze_mesh(
-        "data/final_mesh/final_mesh_NODE.csv",
-        "data/final_mesh/final_mesh_ELEMENT.csv"
-    )
+    final = run_analysis(*MESHES["final"], model=model, store=store, cache=cache,
+                         previous=first if incremental else None)
+    final_mesh, final_errors, final_risks = final.mesh, final.errors, final.hybrid_risks
 
     plot_side_by_side(
         first_mesh,
         first_risks,
         final_mesh,
         final_risks,
-        output_html="first_vs_final_mesh_comparison.html"
+        output_html="first_vs_final_mesh_comparison.html",
+        first_errors=first_errors,
+        final_errors=final_errors
     )
 
     plot_mesh_errors_3d(
         first_mesh,
         first_errors,
-        output_html="first_mesh_error_debug.html"
+        output_html="first_mesh_error_debug.html",
+        neighbors=first.neighbors
     )
 
+    export_risk_glb(final_mesh, final_risks, "final_mesh_risk.glb")
+
+    print_region_changes(first, final)
+    print_components(final)
+
     print("\nFINAL HYBRID HIGH-RISK ELEMENTS (FIRST MESH):")
     for eid, score in first_risks.items():
         if hybrid_category(score) == "HIGH":
@@ -80,5 +324,68 @@ def main():
     print("\n✅ ALL VISUALIZATIONS GENERATED SUCCESSFULLY")
 
 
+def print_region_changes(first, final, top=5):
+    regions = region_deltas(first, final)
+    order = np.argsort(regions["delta_mean_risk"])
+
+    print("\nREGIONS WITH LARGEST RISK CHANGE (FIRST -> FINAL):")
+    if len(order) > 2 * top:
+        order = np.r_[order[:top], order[-top:]]
+    for i in order.tolist():
+        lower = ", ".join(f"{v:.3g}" for v in regions["lower"][i])
+        print(f"Region at ({lower}): "
+              f"elements {regions['first_elements'][i]:.0f} -> {regions['final_elements'][i]:.0f}, "
+              f"mean risk {regions['delta_mean_risk'][i]:+.3f} "
+              f"({regions['matched_delta_risk'][i]:+.3f} over {regions['matched'][i]} matched), "
+              f"error elements {regions['delta_error_elements'][i]:+.0f}")
+
+
+def print_components(analysis, top=5):
+    topology = topology_checks(analysis.mesh, load_rules().coincident_tolerance)
+    rows = component_summary(analysis.mesh, topology, analysis.errors, analysis.hybrid_risks)
+
+    print(f"\nCONNECTED COMPONENTS (FINAL MESH): {len(rows)}")
+    for row in rows[:top]:
+        print(f"Component {row['component']}: {row['elements']} elements, "
+              f"free edges {row['free_edges']}, non-manifold {row['nonmanifold_edges']}, "
+              f"flipped {row['flipped_edges']}, gaps {row['gap_edges']}, "
+              f"mean risk {row['mean_risk']:.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesh quality and risk analysis")
+    parser.add_argument("command", nargs="?", default="analyze",
+                        choices=("analyze", "train"))
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--max-samples", type=int, default=TRAIN_SAMPLE_CAP,
+                        help="cap on training elements (train only)")
+    parser.add_argument("--seed", type=int, default=SAMPLE_SEED,
+                        help="training sample seed (train only)")
+    parser.add_argument("--feature-store",
+                        help="analyze: append features here; "
+                             "train: stream training data from here")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="stage artifact cache directory")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES >> 20,
+                        help="artifact cache size limit; least recently used "
+                             "artifacts are evicted past it")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="recompute every stage")
+    parser.add_argument("--incremental", action="store_true",
+                        help="analyze the final mesh as an edit of the first, "
+                             "recomputing only changed regions")
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else ArtifactCache(args.cache_dir, args.cache_max_mb << 20)
+
+    if args.command == "train" and args.feature_store:
+        train_from_store(args.feature_store, args.model_dir, seed=args.seed)
+    elif args.command == "train":
+        train(args.model_dir, max_samples=args.max_samples, seed=args.seed,
+              cache=cache)
+    else:
+        analyze(args.model_dir, args.feature_store, cache, args.incremental)
+
+
 if __name__ == "__main__":
     main()
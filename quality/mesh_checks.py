@@ -0,0 +1,120 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from core.spatial_index import spatial_index
+from quality.topology import mesh_topology
+
+
+DEFAULT_COINCIDENT_TOLERANCE = 1e-6
+
+
+def coincident_node_pairs(mesh, tol=DEFAULT_COINCIDENT_TOLERANCE):
+    """
+    All node position pairs (i < j) closer than `tol`, as a (P, 2) array,
+    from one pair query on the mesh's cached node KD-tree.
+    """
+    if mesh.num_nodes < 2 or tol <= 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = spatial_index(mesh).node_tree.query_pairs(tol, output_type="ndarray")
+    return pairs.astype(np.int64, copy=False).reshape(-1, 2)
+
+
+def node_clusters(num_nodes, pairs):
+    """(N,) cluster label per node: connected components of the close pairs."""
+    graph = sparse.coo_matrix(
+        (np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(num_nodes, num_nodes)
+    )
+    return connected_components(graph, directed=False)[1]
+
+
+def coincident_node_counts(mesh, tol=DEFAULT_COINCIDENT_TOLERANCE, pairs=None):
+    """(E,) number of each element's nodes that coincide with another node."""
+    if pairs is None:
+        pairs = coincident_node_pairs(mesh, tol)
+    flagged = np.zeros(mesh.num_nodes, dtype=bool)
+    flagged[pairs.ravel()] = True
+
+    out = np.zeros(mesh.num_elements, dtype=np.int64)
+    for block in mesh.blocks.values():
+        out[block.elem_index] = flagged[block.conn].sum(axis=1)
+    return out
+
+
+def duplicate_element_counts(mesh, tol=DEFAULT_COINCIDENT_TOLERANCE, pairs=None):
+    """
+    (E,) number of other elements built on the same set of nodes, with
+    coincident nodes treated as one, so elements stacked on duplicated
+    nodes count as well. Node order and element type are ignored.
+    """
+    if pairs is None:
+        pairs = coincident_node_pairs(mesh, tol)
+    labels = node_clusters(mesh.num_nodes, pairs)
+    out = np.zeros(mesh.num_elements, dtype=np.int64)
+
+    by_size = {}
+    for block in mesh.blocks.values():
+        by_size.setdefault(block.nodes_per_element, []).append(block)
+
+    for blocks in by_size.values():
+        key = np.sort(np.concatenate([labels[b.conn] for b in blocks]), axis=1)
+        elems = np.concatenate([b.elem_index for b in blocks])
+        if len(key) == 0:
+            continue
+
+        order = np.lexsort(key.T[::-1])
+        key = key[order]
+        new = np.r_[True, (key[1:] != key[:-1]).any(axis=1)]
+        group = np.cumsum(new) - 1
+        out[elems[order]] = np.bincount(group)[group] - 1
+
+    return out
+
+
+# Per-element check columns available to rules alongside the metrics
+MESH_CHECKS = {
+    "coincident_nodes": coincident_node_counts,
+    "duplicate_elements": duplicate_element_counts,
+}
+
+# Check columns read off one MeshTopology (see quality/topology.py)
+TOPOLOGY_CHECKS = {
+    "free_edges": "free_edges",
+    "nonmanifold_edges": "nonmanifold_edges",
+    "flipped_edges": "flipped_edges",
+    "gap_edges": "gap_edges",
+    "component_rank": "component",
+}
+
+CHECK_NAMES = set(MESH_CHECKS) | set(TOPOLOGY_CHECKS)
+
+
+def topology_checks(mesh, tol=DEFAULT_COINCIDENT_TOLERANCE, pairs=None):
+    """
+    MeshTopology of `mesh`, with nodes closer than `tol` merged for gaps.
+    Kept on the mesh, so the error stage and later reports share one.
+    """
+    cached = getattr(mesh, "_topology", None)
+    if cached is None or cached[0] != tol:
+        if pairs is None:
+            pairs = coincident_node_pairs(mesh, tol)
+        mesh._topology = (tol, mesh_topology(mesh, tol, node_clusters(mesh.num_nodes, pairs)))
+    return mesh._topology[1]
+
+
+def mesh_check_columns(mesh, names, tol=DEFAULT_COINCIDENT_TOLERANCE):
+    """
+    Computes the check columns (MESH_CHECKS, TOPOLOGY_CHECKS) among
+    `names` for `mesh`, sharing one coincident node search between them.
+    """
+    names = [name for name in names if name in CHECK_NAMES]
+    if not names:
+        return {}
+    pairs = coincident_node_pairs(mesh, tol)
+    out = {name: MESH_CHECKS[name](mesh, tol, pairs) for name in names if name in MESH_CHECKS}
+
+    topology_names = [name for name in names if name in TOPOLOGY_CHECKS]
+    if topology_names:
+        topology = topology_checks(mesh, tol, pairs)
+        out.update({name: getattr(topology, TOPOLOGY_CHECKS[name]) for name in topology_names})
+    return out
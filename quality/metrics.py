@@ -1,5 +1,8 @@
 import numpy as np
 
+from core.element_table import ElementTable
+from core.element_types import element_type
+
 
 def distance(p1, p2):
     return np.linalg.norm(np.array(p1) - np.array(p2))
@@ -40,19 +43,333 @@ def element_area(node_coords):
     return 0.0
 
 
+class QualityMetrics(ElementTable):
+    """
+    Columnar quality metrics: `columns` maps metric name -> (E,) array
+    aligned with `elem_ids`. As a dict it maps elem_id -> {metric: value}.
+    """
+
+    def __init__(self, elem_ids, columns):
+        super().__init__(elem_ids)
+        self.columns = columns
+
+    def to_arrays(self):
+        arrays = {f"col_{name}": col for name, col in self.columns.items()}
+        arrays["elem_ids"] = self.elem_ids
+        return arrays, {"columns": list(self.columns)}
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays["elem_ids"], {name: arrays[f"col_{name}"] for name in meta["columns"]})
+
+    def _row(self, pos):
+        return {name: float(col[pos]) for name, col in self.columns.items()}
+
+    def _rows(self):
+        names = list(self.columns)
+        for values in zip(*(col.tolist() for col in self.columns.values())):
+            yield dict(zip(names, values))
+
+
+METRIC_NAMES = (
+    "area",
+    "aspect_ratio",
+    "edge_ratio",
+    "skew",
+    "warpage",
+    "taper",
+    "min_angle",
+    "max_angle",
+    "jacobian",
+    "volume",
+    "collapse",
+)
+
+
 def compute_quality_metrics(mesh):
-    metrics = {}
+    """
+    Batched metrics for every element, grouped by element type. Metrics
+    that do not apply to a type (area of a solid, volume of a shell) are NaN.
+    """
+    num_elements = mesh.num_elements
+    columns = {name: np.full(num_elements, np.nan) for name in METRIC_NAMES}
+
+    for block in mesh.blocks.values():
+        if len(block) == 0:
+            continue
+        etype = element_type(block.elem_type)
+        p = mesh.coords[block.conn].astype(np.float64, copy=False)   # (m, k, 3)
+        if etype.dim == 3:
+            values = solid_metrics(p, etype)
+        else:
+            values = polygon_metrics(p)
+        for name, col in values.items():
+            columns[name][block.elem_index] = col
+
+    return QualityMetrics(mesh.elem_ids, columns)
+
+
+def metric_columns(metrics):
+    """elem_ids and metric name -> array for QualityMetrics or a plain dict."""
+    if hasattr(metrics, "columns"):
+        return metrics.elem_ids, metrics.columns
+
+    elem_ids = np.fromiter(metrics.keys(), dtype=np.int64, count=len(metrics))
+    names = next(iter(metrics.values()), {}).keys()
+    columns = {
+        name: np.array([m[name] for m in metrics.values()], dtype=np.float64)
+        for name in names
+    }
+    return elem_ids, columns
+
+
+def polygon_metrics(p):
+    """
+    All shell metrics for m polygons with k corners each, p: (m, k, 3).
+    Edge vectors and corner cross products are computed once and shared:
+
+        area          fan triangulation from corner 0 (tri, quad)
+        aspect_ratio  tri: longest / shortest edge
+                      quad: longest / shortest bimedian
+        edge_ratio    longest / shortest edge
+        skew          equiangle skew, 0 ideal .. 1 degenerate
+        warpage       quad: max angle (deg) between the normals of the two
+                      triangles of either diagonal split (0 .. 90, so a flat
+                      concave quad is not reported as warped)
+        taper         quad: 1 - smallest / mean corner triangle area
+        min_angle,
+        max_angle     interior corner angles (deg), > 180 when concave
+        jacobian      min / max corner Jacobian, < 0 when folded
+    """
+    m, k = p.shape[:2]
+
+    e = np.roll(p, -1, axis=1) - p                  # e[i] = p[i+1] - p[i]
+    edges = np.linalg.norm(e, axis=2)               # (m, k)
+    emax, emin = edges.max(axis=1), edges.min(axis=1)
+    edge_ratio = _ratio(emax, emin)
+
+    # Corner i spans e[i] and -e[i-1]
+    prev = -np.roll(e, 1, axis=1)
+    corner = np.cross(e, prev)                      # (m, k, 3)
+    normal = corner.sum(axis=1)
+    normal_len = np.linalg.norm(normal, axis=1)
+    unit_normal = np.divide(
+        normal, normal_len[:, None], out=np.zeros_like(normal),
+        where=normal_len[:, None] > 0
+    )
+    corner_jac = np.einsum("mkj,mj->mk", corner, unit_normal)
+
+    # Interior angles, signed against the element normal
+    dots = np.einsum("mkj,mkj->mk", e, prev)
+    angles = np.degrees(np.arctan2(corner_jac, dots)) % 360.0
+    min_angle, max_angle = angles.min(axis=1), angles.max(axis=1)
+
+    ideal = 180.0 * (k - 2) / k if k > 2 else 0.0
+    if ideal > 0:
+        skew = np.maximum(
+            (max_angle - ideal) / (180.0 - ideal),
+            (ideal - min_angle) / ideal,
+        ).clip(0.0, 1.0)
+    else:
+        skew = np.zeros(m)
+
+    jacobian = _jacobian_ratio(corner_jac)
+
+    area = np.zeros(m)
+    aspect = edge_ratio
+    warpage = np.zeros(m)
+    taper = np.zeros(m)
+
+    if k == 3:
+        area = 0.5 * np.linalg.norm(corner[:, 0], axis=1)
+
+    elif k == 4:
+        area = (triangle_areas(p[:, 0], p[:, 1], p[:, 2])
+                + triangle_areas(p[:, 0], p[:, 3], p[:, 2]))
+
+        mid = 0.5 * (p + np.roll(p, -1, axis=1))       # edge midpoints
+        b1 = np.linalg.norm(mid[:, 2] - mid[:, 0], axis=1)
+        b2 = np.linalg.norm(mid[:, 3] - mid[:, 1], axis=1)
+        aspect = _ratio(np.maximum(b1, b2), np.minimum(b1, b2))
+
+        warpage = np.maximum(
+            _normal_angle(np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]),
+                          np.cross(p[:, 2] - p[:, 0], p[:, 3] - p[:, 0])),
+            _normal_angle(np.cross(p[:, 2] - p[:, 1], p[:, 3] - p[:, 1]),
+                          np.cross(p[:, 3] - p[:, 1], p[:, 0] - p[:, 1])),
+        )
+
+        corner_area = 0.5 * np.linalg.norm(corner, axis=2)
+        mean_area = corner_area.mean(axis=1)
+        taper = 1.0 - _ratio(corner_area.min(axis=1), mean_area, where=mean_area > 0)
+        taper[mean_area == 0] = 0.0
+
+    return {
+        "area": area,
+        "aspect_ratio": aspect,
+        "edge_ratio": edge_ratio,
+        "skew": skew,
+        "warpage": warpage,
+        "taper": taper,
+        "min_angle": min_angle,
+        "max_angle": max_angle,
+        "jacobian": jacobian,
+    }
+
+
+# ----------------------------------------------------------------
+# Solids (isoparametric)
+#
+# Each type has natural-coordinate shape function derivatives evaluated
+# at its volume quadrature points and at its corners. One einsum builds
+# every Jacobian matrix of the block, so volume and the corner Jacobian
+# ratio come out of the same pass.
+# ----------------------------------------------------------------
+
+def _tet4_dshape(pts):
+    d = np.array([[-1, -1, -1], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=float)
+    return np.broadcast_to(d, (len(pts), 4, 3))
+
+
+def _tet10_dshape(pts):
+    r, s, t = pts.T
+    L = np.stack([1 - r - s - t, r, s, t], axis=1)                  # (q, 4)
+    dL = np.array([[-1, -1, -1], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=float)
+    mids = [(0, 1), (1, 2), (2, 0), (0, 3), (1, 3), (2, 3)]
+
+    d = np.zeros((len(pts), 10, 3))
+    for i in range(4):
+        d[:, i] = (4 * L[:, i] - 1)[:, None] * dL[i]
+    for n, (i, j) in enumerate(mids, start=4):
+        d[:, n] = 4 * (L[:, i, None] * dL[j] + L[:, j, None] * dL[i])
+    return d
+
+
+_HEX_SIGNS = np.array([[-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+                       [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1]], dtype=float)
+
+
+def _hex8_dshape(pts):
+    f = 1 + pts[:, None, :] * _HEX_SIGNS[None]                      # (q, 8, 3)
+    d = np.empty_like(f)
+    d[..., 0] = _HEX_SIGNS[:, 0] * f[..., 1] * f[..., 2]
+    d[..., 1] = _HEX_SIGNS[:, 1] * f[..., 0] * f[..., 2]
+    d[..., 2] = _HEX_SIGNS[:, 2] * f[..., 0] * f[..., 1]
+    return d / 8.0
+
+
+def _penta6_dshape(pts):
+    r, s, z = pts.T
+    L = np.stack([1 - r - s, r, s], axis=1)
+    dL = np.array([[-1, -1], [1, 0], [0, 1]], dtype=float)
+
+    d = np.zeros((len(pts), 6, 3))
+    for half, sign in ((0, -1), (3, 1)):
+        h = (1 + sign * z) / 2
+        d[:, half:half + 3, :2] = h[:, None, None] * dL[None]
+        d[:, half:half + 3, 2] = sign * L / 2
+    return d
+
+
+def _gauss2():
+    g = 1 / np.sqrt(3)
+    return np.array([[x, y, z] for x in (-g, g) for y in (-g, g) for z in (-g, g)])
+
+
+_TET_CORNERS = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=float)
+_TET_QUAD = np.array([[0.1381966, 0.1381966, 0.1381966],
+                      [0.5854102, 0.1381966, 0.1381966],
+                      [0.1381966, 0.5854102, 0.1381966],
+                      [0.1381966, 0.1381966, 0.5854102]])
+_PENTA_CORNERS = np.array([[0, 0, -1], [1, 0, -1], [0, 1, -1],
+                           [0, 0, 1], [1, 0, 1], [0, 1, 1]], dtype=float)
+_PENTA_QUAD = np.array([[a, b, z] for z in (-1 / np.sqrt(3), 1 / np.sqrt(3))
+                        for a, b in ((1 / 6, 1 / 6), (2 / 3, 1 / 6), (1 / 6, 2 / 3))])
+
+# type -> (dN at quadrature points, quadrature weights, dN at corners)
+SOLID_RULES = {
+    "TET4": (_tet4_dshape(_TET_QUAD[:1]), np.array([1 / 6]),
+             _tet4_dshape(_TET_CORNERS)),
+    "TET10": (_tet10_dshape(_TET_QUAD), np.full(4, 1 / 24),
+              _tet10_dshape(_TET_CORNERS)),
+    "HEX8": (_hex8_dshape(_gauss2()), np.ones(8),
+             _hex8_dshape(_HEX_SIGNS)),
+    "PENTA6": (_penta6_dshape(_PENTA_QUAD), np.full(6, 1 / 6),
+               _penta6_dshape(_PENTA_CORNERS)),
+}
+
+# 3V / A^1.5 of a regular tetrahedron, so a regular tet has collapse 1
+_REGULAR_TET_COLLAPSE = 3 * (1 / (6 * np.sqrt(2))) / (np.sqrt(3) / 4) ** 1.5
+
+
+def solid_metrics(p, etype):
+    """
+    Metrics for m solids of one type, p: (m, nodes, 3).
+
+        volume        signed, negative when inverted
+        jacobian      min corner det(J) / max |corner det(J)|
+        aspect_ratio,
+        edge_ratio    longest / shortest corner edge
+        collapse      tets: min over corners of the normalised height to
+                      the opposite face, 1 for a regular tet, 0 collapsed
+    """
+    m = len(p)
+    dshape_q, weights, dshape_c = SOLID_RULES[etype.name]
+
+    det_q = _jacobian_dets(p, dshape_q)
+    det_c = _jacobian_dets(p, dshape_c)
+    volume = det_q @ weights
+
+    corners = p[:, :etype.corners]
+    edges = np.linalg.norm(
+        corners[:, etype.edges[:, 1]] - corners[:, etype.edges[:, 0]], axis=2
+    )
+    edge_ratio = _ratio(edges.max(axis=1), edges.min(axis=1))
+
+    collapse = np.full(m, np.nan)
+    if etype.name in ("TET4", "TET10"):
+        # Opposite face of corner i is face i of the outward face list
+        face_area = np.stack([
+            triangle_areas(corners[:, a], corners[:, b], corners[:, c])
+            for a, b, c in ((1, 2, 3), (0, 2, 3), (0, 1, 3), (0, 1, 2))
+        ], axis=1)
+        tet_volume = np.abs(np.linalg.det(corners[:, 1:] - corners[:, :1])) / 6
+        collapse = _ratio(
+            3 * tet_volume[:, None], face_area ** 1.5, where=face_area > 0
+        ).min(axis=1) / _REGULAR_TET_COLLAPSE
+
+    return {
+        "volume": volume,
+        "jacobian": _jacobian_ratio(det_c),
+        "aspect_ratio": edge_ratio,
+        "edge_ratio": edge_ratio,
+        "collapse": collapse,
+    }
+
+
+def _jacobian_dets(p, dshape):
+    """det(J) of every element at every point, J[a, b] = sum_n x_n[a] dN_n/dxi_b."""
+    J = np.einsum("mna,qnb->mqab", p, dshape)
+    return np.linalg.det(J)
+
+
+def _jacobian_ratio(dets):
+    """min / max |value| over the last axis; 1 is ideal, <= 0 folded."""
+    jmax = np.abs(dets).max(axis=1)
+    return _ratio(dets.min(axis=1), jmax)
+
+
+def _ratio(num, den, where=None):
+    """num / den, 0 where den is 0 (same convention as the edge ratio)."""
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape),
+                     where=(den > 0) if where is None else where)
 
-    for elem_id, element in mesh.elements.items():
-        coords = [mesh.nodes[nid].coords() for nid in element.node_ids]
 
-        edges = element_edges(coords)
-        area = element_area(coords)
+def _normal_angle(n1, n2):
+    cross = np.linalg.norm(np.cross(n1, n2), axis=1)
+    dot = np.einsum("mj,mj->m", n1, n2)
+    return np.degrees(np.arctan2(cross, np.abs(dot)))
 
-        metrics[elem_id] = {
-            "area": area,
-            "aspect_ratio": max(edges) / min(edges) if min(edges) > 0 else 0,
-            "edge_ratio": max(edges) / min(edges) if min(edges) > 0 else 0
-        }
 
-    return metrics
+def triangle_areas(a, b, c):
+    return 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1)
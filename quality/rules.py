@@ -1,26 +1,190 @@
-def detect_mesh_errors(metrics, neighbors):
-    errors = {}
+import hashlib
+import json
+import os
 
-    for elem_id, m in metrics.items():
-        elem_errors = []
+import numpy as np
 
-        # Rule 1: Very small area
-        if m["area"] < 1.0:
-            elem_errors.append("SMALL_AREA")
+from core.element_table import ElementTable
+from core.mesh_neighbors import neighbor_count_array
+from quality.mesh_checks import CHECK_NAMES, DEFAULT_COINCIDENT_TOLERANCE, mesh_check_columns
+from quality.metrics import metric_columns
 
-        # Rule 2: Bad aspect ratio
-        if m["aspect_ratio"] > 3.0:
-            elem_errors.append("BAD_ASPECT_RATIO")
 
-        # Rule 3: Poor edge transition
-        if m["edge_ratio"] > 3.0:
-            elem_errors.append("BAD_TRANSITION")
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "rules.json")
 
-        # Rule 4: Missing neighbors
-        if len(neighbors.get(elem_id, [])) < 2:
-            elem_errors.append("MISSING_NEIGHBOR")
+COMPARATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
 
-        if elem_errors:
-            errors[elem_id] = elem_errors
 
-    return errors
+class Rule:
+    def __init__(self, code, metric, op, threshold, severity="error"):
+        if op not in COMPARATORS:
+            raise ValueError(f"Rule {code}: unknown comparator {op!r}")
+        self.code = code
+        self.metric = metric
+        self.op = op
+        self.threshold = threshold
+        self.severity = severity
+
+
+class RuleSet:
+    """
+    Rules compiled to bit positions: rule i sets bit i of each element's
+    mask, so one mask encodes every violation of an element.
+    """
+
+    def __init__(self, rules, settings=None):
+        self.rules = list(rules)
+        self.settings = dict(settings or {})
+        if len(self.rules) > 64:
+            raise ValueError("At most 64 rules are supported")
+        self.codes = [r.code for r in self.rules]
+        self.severities = {r.code: r.severity for r in self.rules}
+        self.dtype = next(
+            dt for dt in (np.uint8, np.uint16, np.uint32, np.uint64)
+            if np.iinfo(dt).bits >= len(self.rules)
+        )
+
+    def evaluate(self, columns, num_elements):
+        """OR each rule's boolean mask into the per-element bitmask."""
+        mask = np.zeros(num_elements, dtype=self.dtype)
+        for bit, rule in enumerate(self.rules):
+            if rule.metric not in columns:
+                raise KeyError(f"Rule {rule.code}: unknown metric {rule.metric!r}")
+            hit = COMPARATORS[rule.op](columns[rule.metric], rule.threshold)
+            mask |= hit.astype(self.dtype) << self.dtype(bit)
+        return mask
+
+    @property
+    def fingerprint(self):
+        """Hash of the full rule spec (every rule field and the settings)."""
+        spec = {
+            "rules": [[r.code, r.metric, r.op, r.threshold, r.severity] for r in self.rules],
+            "settings": self.settings,
+        }
+        data = json.dumps(spec, sort_keys=True).encode()
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    @property
+    def coincident_tolerance(self):
+        return self.settings.get("coincident_tolerance", DEFAULT_COINCIDENT_TOLERANCE)
+
+    def mesh_checks(self):
+        """Names of the mesh check columns (see CHECK_NAMES) some rule reads."""
+        return [r.metric for r in self.rules if r.metric in CHECK_NAMES]
+
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    """
+    Reads a rule config: {"rules": [{code, metric, op, threshold, severity}],
+    "settings": {...}}; settings (e.g. coincident_tolerance) are optional.
+    """
+    with open(path, "r") as f:
+        config = json.load(f)
+    return RuleSet((Rule(**r) for r in config["rules"]), config.get("settings"))
+
+
+class MeshErrors(ElementTable):
+    """
+    Rule violations as a per-element bitmask aligned with `elem_ids`.
+
+    As a dict it maps elem_id -> [codes], containing only elements with at
+    least one violation, with codes in rule order; lists are decoded on access.
+    `rules_hash` is the fingerprint of the RuleSet that produced it.
+    """
+
+    def __init__(self, elem_ids, mask, codes, severities=None, rules_hash=None):
+        super().__init__(elem_ids)
+        self.mask = mask
+        self.codes = list(codes)
+        self.severities = severities or {}
+        self.rules_hash = rules_hash
+
+    def to_arrays(self):
+        arrays = {"elem_ids": self.elem_ids, "mask": self.mask}
+        meta = {"codes": self.codes, "severities": self.severities, "rules_hash": self.rules_hash}
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        return cls(arrays["elem_ids"], arrays["mask"], meta["codes"], meta["severities"],
+                   meta.get("rules_hash"))
+
+    def bit(self, code):
+        return self.codes.index(code)
+
+    def has(self, code):
+        """Boolean array: elements violating `code`."""
+        return (self.mask >> self.mask.dtype.type(self.bit(code))) & 1 == 1
+
+    def error_counts(self):
+        """Number of violated rules per element."""
+        return np.unpackbits(
+            self.mask.astype(">u8").view(np.uint8).reshape(-1, 8), axis=1
+        ).sum(axis=1)
+
+    def code_counts(self):
+        """code -> number of elements violating it."""
+        return {code: int(self.has(code).sum()) for code in self.codes}
+
+    def _row(self, pos):
+        value = int(self.mask[pos])
+        if value == 0:
+            raise KeyError(self.elem_ids[pos])
+        return [code for bit, code in enumerate(self.codes) if value >> bit & 1]
+
+    def _rows(self):
+        for pos in np.flatnonzero(self.mask).tolist():
+            yield self._row(pos)
+
+    def __contains__(self, elem_id):
+        pos = self.index.get(elem_id)
+        return pos is not None and self.mask[pos] != 0
+
+    def __iter__(self):
+        return iter(self.elem_ids[self.mask != 0].tolist())
+
+    def __len__(self):
+        return int(np.count_nonzero(self.mask))
+
+
+def detect_mesh_errors(metrics, neighbors, rules=None, mesh=None):
+    """
+    Evaluates the rule set (default: quality/rules.json) over whole metric
+    columns. `neighbor_count` is available to rules alongside the metrics,
+    and with `mesh` (aligned with the metrics) so are the mesh checks
+    (coincident_nodes, duplicate_elements) and topology checks (free,
+    non-manifold, flipped and gap edges, component_rank); without it those
+    rules report nothing.
+    """
+    rules = rules or load_rules()
+    elem_ids, columns = metric_columns(metrics)
+    columns = dict(columns)
+    columns["neighbor_count"] = neighbor_count_array(neighbors, elem_ids)
+    columns.update(check_columns(rules, mesh, len(elem_ids)))
+
+    mask = rules.evaluate(columns, len(elem_ids))
+    return MeshErrors(elem_ids, mask, rules.codes, rules.severities, rules.fingerprint)
+
+
+def check_columns(rules, mesh, num_elements):
+    """The mesh-check columns the rules use; all zero without a mesh."""
+    if mesh is None:
+        return {name: np.zeros(num_elements, dtype=np.int64) for name in rules.mesh_checks()}
+    return mesh_check_columns(mesh, rules.mesh_checks(), rules.coincident_tolerance)
+
+
+def error_count_array(errors, elem_ids):
+    """Violated-rule counts in `elem_ids` order, for MeshErrors or a plain dict."""
+    if isinstance(errors, MeshErrors) and np.array_equal(errors.elem_ids, elem_ids):
+        return errors.error_counts()
+    return np.array(
+        [len(errors.get(eid, [])) for eid in np.asarray(elem_ids).tolist()],
+        dtype=np.int64
+    )
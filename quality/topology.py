@@ -0,0 +1,210 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from core.element_types import element_type
+from core.spatial_index import spatial_index
+
+
+class MeshTopology:
+    """
+    Facet topology of one mesh. Facets are the edges of shell elements and
+    the faces of solids; a facet used by one element is free, by two is
+    manifold and by more is non-manifold. Per-element (E,) counts:
+        free_edges         free shell edges (solid skin faces don't count)
+        nonmanifold_edges  facets shared by more than two elements
+        flipped_edges      manifold facets both elements traverse in the
+                           same direction (inconsistent orientation)
+        gap_edges          free facets that close up once coincident nodes
+                           are merged, or that a free node lies on (a
+                           T-junction): real gaps, unlike the mesh boundary
+    and components (elements connected through shared nodes):
+        component          (E,) component label, 0 for the largest
+        component_size     (E,) elements in the element's component
+    """
+
+    def __init__(self, free_edges, nonmanifold_edges, flipped_edges, gap_edges, component):
+        self.free_edges = free_edges
+        self.nonmanifold_edges = nonmanifold_edges
+        self.flipped_edges = flipped_edges
+        self.gap_edges = gap_edges
+        self.component = component
+        self.component_size = np.bincount(component)[component] if len(component) else component
+
+    @property
+    def num_components(self):
+        return int(self.component.max()) + 1 if len(self.component) else 0
+
+
+def facet_table(mesh):
+    """
+    One row per (element, facet), grouped by corner count:
+    {corners: (nodes (F, corners) in element order, elem (F,), shell (F,))}.
+    Collapsed shell edges are dropped.
+    """
+    grouped = {}
+
+    for block in mesh.blocks.values():
+        etype = element_type(block.elem_type)
+        if block.nodes_per_element < 3:
+            continue
+        if etype.dim == 3:
+            facets = [list(f) for f in etype.faces]
+        else:
+            facets = etype.edges.tolist()
+
+        for facet in facets:
+            nodes = block.conn[:, facet]
+            entry = grouped.setdefault(len(facet), ([], [], []))
+            entry[0].append(nodes)
+            entry[1].append(block.elem_index)
+            entry[2].append(np.full(len(block), etype.dim != 3))
+
+    out = {}
+    for corners, (nodes, elems, shell) in grouped.items():
+        nodes, elems, shell = np.concatenate(nodes), np.concatenate(elems), np.concatenate(shell)
+        if corners == 2:
+            keep = nodes[:, 0] != nodes[:, 1]
+            nodes, elems, shell = nodes[keep], elems[keep], shell[keep]
+        out[corners] = (nodes, elems, shell)
+    return out
+
+
+def facet_groups(nodes):
+    """(F,) group id of every facet by its node set, and (G,) uses per group."""
+    if len(nodes) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    key = np.sort(nodes, axis=1)
+    order = np.lexsort(key.T[::-1])
+    key = key[order]
+
+    new = np.r_[True, (key[1:] != key[:-1]).any(axis=1)]
+    group = np.empty(len(nodes), dtype=np.int64)
+    group[order] = np.cumsum(new) - 1
+    return group, np.bincount(group)
+
+
+def facet_orientation(nodes):
+    """
+    (F,) traversal direction of every facet relative to its node set: with
+    the facet rotated to start at its smallest node, True when the next
+    node is smaller than the previous one (for edges: when it starts at
+    its smaller node). Two uses of a facet are consistent when they differ.
+    """
+    k = nodes.shape[1]
+    rows = np.arange(len(nodes))
+    first = nodes.argmin(axis=1)
+    if k == 2:
+        return first == 0
+    return nodes[rows, (first + 1) % k] < nodes[rows, (first - 1) % k]
+
+
+def mesh_topology(mesh, tol, labels):
+    """
+    MeshTopology of `mesh`. `labels` (N,) merge coincident nodes (see
+    node_clusters), `tol` is the distance used to find them.
+    """
+    n = mesh.num_elements
+    counts = {
+        name: np.zeros(n, dtype=np.int64)
+        for name in ("free", "nonmanifold", "flipped", "gap")
+    }
+    free_shell_edges = []
+
+    for corners, (nodes, elems, shell) in facet_table(mesh).items():
+        group, uses = facet_groups(nodes)
+        facet_uses = uses[group]
+        free = facet_uses == 1
+
+        # Manifold facets: one bit of orientation per use, summed per group
+        same = np.bincount(group, facet_orientation(nodes), len(uses))
+        flipped = (facet_uses == 2) & (same[group] != 1)
+
+        # Free facets still free after merging coincident nodes are boundary
+        merged, merged_uses = facet_groups(labels[nodes])
+        gap = free & (merged_uses[merged] > 1)
+
+        counts["free"] += np.bincount(elems[free & shell], minlength=n)
+        counts["nonmanifold"] += np.bincount(elems[facet_uses > 2], minlength=n)
+        counts["flipped"] += np.bincount(elems[flipped], minlength=n)
+        counts["gap"] += np.bincount(elems[gap], minlength=n)
+        if corners == 2:
+            free_shell_edges.append((nodes[free & ~gap], elems[free & ~gap]))
+
+    if free_shell_edges:
+        edges = np.concatenate([e for e, _ in free_shell_edges])
+        owners = np.concatenate([o for _, o in free_shell_edges])
+        hit = t_junction_edges(mesh, edges, tol)
+        counts["gap"] += np.bincount(owners[hit], minlength=n)
+
+    return MeshTopology(
+        counts["free"], counts["nonmanifold"], counts["flipped"], counts["gap"],
+        element_components(mesh)
+    )
+
+
+def t_junction_edges(mesh, edges, tol):
+    """
+    (F,) True for free edges (node position pairs) with another free-edge
+    node within `tol` of their interior, and for the free edges of that
+    node: the two sides of the junction are meshed with different node
+    counts and don't connect.
+    """
+    hit = np.zeros(len(edges), dtype=bool)
+    if len(edges) == 0:
+        return hit
+
+    free_node = np.zeros(mesh.num_nodes, dtype=bool)
+    free_node[edges.ravel()] = True
+    a, b = mesh.coords[edges[:, 0]], mesh.coords[edges[:, 1]]
+    length = np.linalg.norm(b - a, axis=1)
+
+    near = spatial_index(mesh).nodes_within(0.5 * (a + b), 0.5 * length + tol)
+    sizes = np.fromiter((len(c) for c in near), dtype=np.int64, count=len(near))
+    if sizes.sum() == 0:
+        return hit
+    edge = np.repeat(np.arange(len(edges)), sizes)
+    node = np.concatenate([np.asarray(c, dtype=np.int64) for c in near if len(c)])
+
+    keep = free_node[node] & (node != edges[edge, 0]) & (node != edges[edge, 1])
+    edge, node = edge[keep], node[keep]
+
+    d = b[edge] - a[edge]
+    t = ((mesh.coords[node] - a[edge]) * d).sum(axis=1) / np.maximum(length[edge] ** 2, 1e-300)
+    foot = a[edge] + t[:, None] * d
+    on_edge = (t > 0) & (t < 1) & (np.linalg.norm(mesh.coords[node] - foot, axis=1) <= tol)
+    hit[edge[on_edge]] = True
+
+    hanging = np.zeros(mesh.num_nodes, dtype=bool)
+    hanging[node[on_edge]] = True
+    hit |= hanging[edges].any(axis=1)
+    return hit
+
+
+def element_components(mesh):
+    """
+    (E,) connected component of every element, elements being connected
+    through shared nodes. Components are numbered by decreasing size, so
+    0 is the main body.
+    """
+    n = mesh.num_elements
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Bipartite element-node graph: element p is vertex p, node i is n + i
+    blocks = list(mesh.blocks.values())
+    elems = np.concatenate([np.repeat(b.elem_index, b.nodes_per_element) for b in blocks])
+    nodes = np.concatenate([b.conn.ravel() for b in blocks])
+    graph = sparse.coo_matrix(
+        (np.ones(len(elems)), (elems, n + nodes)), shape=(n + mesh.num_nodes,) * 2
+    )
+    labels = connected_components(graph, directed=False)[1][:n]
+
+    # Relabel by decreasing size, ties by first element
+    sizes = np.bincount(labels)
+    first = np.full(len(sizes), n)
+    np.minimum.at(first, labels, np.arange(n))
+    used = np.flatnonzero(sizes)
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[used[np.lexsort((first[used], -sizes[used]))]] = np.arange(len(used))
+    return rank[labels]
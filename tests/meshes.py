@@ -0,0 +1,25 @@
+from core.mesh_objects import Element, Mesh, Node
+
+
+def strip_mesh(shift=0.0):
+    """Two quads and two triangles side by side; `shift` moves the triangle nodes."""
+    nodes = [Node(i + 1, i, 0, 0) for i in range(3)] + [Node(i + 4, i, 1, 0) for i in range(3)]
+    nodes += [Node(7, 3 + shift, 0, 0), Node(8, 3 + shift, 1, 0)]
+    elements = [
+        Element(1, [1, 2, 5, 4], "QUAD4"),
+        Element(2, [2, 3, 6, 5], "QUAD4"),
+        Element(3, [3, 7, 8], "TRIA3"),
+        Element(4, [3, 8, 6], "TRIA3"),
+    ]
+    return Mesh.from_objects(nodes, elements)
+
+
+def grid_mesh(n):
+    """n x n QUAD4 grid on the unit square."""
+    nodes = [Node(j * (n + 1) + i + 1, i / n, j / n, 0) for j in range(n + 1) for i in range(n + 1)]
+    elements = [
+        Element(j * n + i + 1, [a, a + 1, a + n + 2, a + n + 1], "QUAD4")
+        for j in range(n) for i in range(n)
+        for a in [j * (n + 1) + i + 1]
+    ]
+    return Mesh.from_objects(nodes, elements)
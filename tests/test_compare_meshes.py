@@ -0,0 +1,34 @@
+import numpy as np
+
+from analysis.compare_meshes import region_deltas
+from quality.metrics import compute_quality_metrics
+from tests.meshes import strip_mesh
+
+
+def analyzed(mesh, risk):
+    return {
+        "mesh": mesh,
+        "metrics": compute_quality_metrics(mesh),
+        "errors": {},
+        "risks": {eid: risk for eid in mesh.elem_ids.tolist()},
+    }
+
+
+def test_region_deltas_follow_matches():
+    first = analyzed(strip_mesh(), 0.2)
+    final = analyzed(strip_mesh(), 0.5)
+    regions = region_deltas(first, final, cells=2)
+
+    assert regions["matched"].sum() == 4
+    assert np.array_equal(regions["matched"], regions["final_elements"])
+    assert np.allclose(regions["matched_delta_risk"][regions["matched"] > 0], 0.3)
+
+
+def test_unmatched_elements_count_by_centroid():
+    first = analyzed(strip_mesh(), 0.2)
+    final = analyzed(strip_mesh(shift=40.0), 0.2)
+    regions = region_deltas(first, final, cells=4, first_pos=np.array([0, 1, -1, -1]))
+
+    assert regions["final_elements"].sum() == 4
+    assert regions["matched"].sum() == 2
+    assert np.isnan(regions["matched_delta_risk"][regions["matched"] == 0]).all()
@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from core.element_table import ElementTable, ElementValues
+
+
+def test_subclass_missing_serialization_fails_on_creation():
+    class RowsOnly(ElementTable):
+        def _row(self, pos):
+            return pos
+
+    with pytest.raises(TypeError):
+        RowsOnly([1, 2])
+
+
+def test_element_values_round_trip():
+    table = ElementValues([10, 20], np.array([0.5, 1.5]))
+    again = ElementValues.from_arrays(*table.to_arrays())
+    assert dict(again) == {10: 0.5, 20: 1.5}
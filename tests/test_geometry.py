@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from visualization.geometry import category_codes, lod_geometry, mesh_geometry
+from tests.meshes import grid_mesh
+
+
+@pytest.mark.parametrize("budget", [0, 1, 2, 10, 50])
+@pytest.mark.parametrize("prioritized", [False, True])
+def test_lod_fits_small_budgets(budget, prioritized):
+    mesh = grid_mesh(20)
+    geometry = mesh_geometry(mesh)
+    priority = np.zeros(mesh.num_elements)
+    if prioritized:
+        priority[::7] = 1.0 + np.linspace(0, 1, len(priority[::7]))
+
+    lod = lod_geometry(geometry, priority, budget)
+    assert lod.num_triangles <= budget
+    assert len(lod.owner) == lod.num_triangles
+    if lod.num_triangles:
+        assert lod.triangles.max() < len(lod.vertices)
+
+
+def test_lod_keeps_prioritized_triangles():
+    mesh = grid_mesh(20)
+    geometry = mesh_geometry(mesh)
+    priority = np.zeros(mesh.num_elements)
+    priority[[5, 50]] = 2.0
+
+    lod = lod_geometry(geometry, priority, 200)
+    assert lod.num_triangles <= 200
+    assert {5, 50} <= set(lod.owner.tolist())
+
+
+def test_category_codes_match_names_and_reject_unknown():
+    names = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+    categories = np.array(["HIGH", "LOW", "CRITICAL", "HIGH"])
+    assert category_codes(categories, names).tolist() == [2, 0, 3, 2]
+    with pytest.raises(KeyError):
+        category_codes(np.array(["LOW", "SEVERE"]), names)
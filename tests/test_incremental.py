@@ -0,0 +1,46 @@
+import numpy as np
+
+from analysis.incremental import update_analysis
+from core.mesh_loader import load_mesh
+from main import run_analysis
+from quality.rules import Rule, RuleSet, detect_mesh_errors, load_rules
+
+
+def write_grid(tmp_path, n=12, seed=0):
+    rng = np.random.default_rng(seed)
+    x, y = np.meshgrid(np.arange(n + 1.0), np.arange(n + 1.0))
+    coords = np.stack([x.ravel(), y.ravel()], axis=1) + rng.uniform(-0.3, 0.3, ((n + 1) ** 2, 2))
+    node_csv, elem_csv = tmp_path / "grid_NODE.csv", tmp_path / "grid_ELEMENT.csv"
+    with open(node_csv, "w") as f:
+        f.write("node_id,x,y,z\n")
+        for i, (px, py) in enumerate(coords):
+            f.write(f"{i + 1},{px},{py},0\n")
+    with open(elem_csv, "w") as f:
+        f.write("elem_id,elem_type,n1,n2,n3,n4\n")
+        for j in range(n):
+            for i in range(n):
+                a = j * (n + 1) + i + 1
+                f.write(f"{j * n + i + 1},CQUAD4,{a},{a + 1},{a + n + 2},{a + n + 1}\n")
+    return str(node_csv), str(elem_csv)
+
+
+def test_changed_threshold_reevaluates_unchanged_rows(tmp_path):
+    node_csv, elem_csv = write_grid(tmp_path)
+    previous = run_analysis(node_csv, elem_csv)
+
+    # Same codes, stricter SMALL_AREA threshold
+    base = load_rules()
+    rules = RuleSet(
+        [Rule(r.code, r.metric, r.op, 1.2 if r.code == "SMALL_AREA" else r.threshold, r.severity)
+         for r in base.rules],
+        base.settings
+    )
+    assert rules.codes == base.codes and rules.fingerprint != base.fingerprint
+
+    mesh = load_mesh(node_csv, elem_csv)
+    analysis, _ = update_analysis(previous, mesh, rules=rules)
+    fresh = detect_mesh_errors(analysis.metrics, analysis.neighbors, rules, mesh=mesh)
+
+    assert not np.array_equal(previous.errors.mask, fresh.mask)
+    assert np.array_equal(analysis.errors.mask, fresh.mask)
+    assert analysis.errors.rules_hash == rules.fingerprint
@@ -0,0 +1,25 @@
+import numpy as np
+
+from core.mesh_diff import diff_meshes, match_rows
+from tests.meshes import strip_mesh
+
+
+def test_match_rows_empty():
+    ref = np.arange(6).reshape(2, 3)
+    assert match_rows(ref, ref[:0]).shape == (0,)
+    assert (match_rows(ref[:0], ref) == -1).all()
+
+
+def test_identical_meshes_match():
+    old, new = strip_mesh(), strip_mesh()
+    diff = diff_meshes(old, new)
+    assert (diff.old_pos >= 0).all()
+    assert len(diff.removed) == 0
+
+
+def test_whole_block_changed():
+    old, new = strip_mesh(), strip_mesh(shift=0.5)
+    diff = diff_meshes(old, new)
+    changed = set(new.elem_ids[diff.changed].tolist())
+    assert changed == {3, 4}
+    assert set(old.elem_ids[diff.removed].tolist()) == {3, 4}
@@ -0,0 +1,25 @@
+import shutil
+
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+from ai.model_store import ModelStore
+from main import model_identity
+
+
+def fitted(depth):
+    rng = np.random.default_rng(depth)
+    return DecisionTreeClassifier(max_depth=depth).fit(rng.random((50, 3)), np.arange(50) % 2)
+
+
+def test_retrained_store_changes_model_identity(tmp_path):
+    store = ModelStore(str(tmp_path / "models"))
+    store.save(fitted(1))
+    before = model_identity(store.lazy())
+
+    shutil.rmtree(store.root)
+    store.save(fitted(3))
+    after = model_identity(store.lazy())
+
+    assert before["version"] == after["version"]
+    assert before != after
@@ -0,0 +1,35 @@
+import numpy as np
+
+from ai.feature_builder import FEATURE_NAMES, FeatureMatrix
+from ai.feature_store import FeatureStore
+from ai.rf_model import train_rf_streaming
+
+
+def filled_store(root, labels):
+    rng = np.random.default_rng(0)
+    X = rng.random((len(labels), len(FEATURE_NAMES)))
+    store = FeatureStore(str(root))
+    store.append(FeatureMatrix(np.arange(len(labels)), X), np.asarray(labels), key="mesh")
+    return store
+
+
+def test_streaming_builds_exactly_n_estimators(tmp_path):
+    store = filled_store(tmp_path, np.arange(300) % 2)
+    model = train_rf_streaming(store, batch_size=100, n_estimators=100, n_jobs=1)
+    assert model.n_estimators == 100
+    assert len(model.estimators_) == 100
+
+
+def test_single_label_batches_keep_their_trees(tmp_path):
+    # Last batch holds one label only and is merged into a neighbor
+    labels = np.r_[np.arange(200) % 2, np.zeros(50, dtype=np.int64)]
+    store = filled_store(tmp_path, labels)
+    model = train_rf_streaming(store, batch_size=50, n_estimators=7, n_jobs=1)
+    assert len(model.estimators_) == 7
+
+
+def test_more_batches_than_trees_uses_every_batch(tmp_path, capsys):
+    store = filled_store(tmp_path, np.arange(3000) % 2)
+    model = train_rf_streaming(store, batch_size=100, n_estimators=10, n_jobs=1)
+    assert len(model.estimators_) == 30
+    assert "on 3000 of 3000 stored elements" in capsys.readouterr().out
@@ -0,0 +1,252 @@
+# ==========================================================
+# SHARED 3D RENDER GEOMETRY
+# ==========================================================
+
+import numpy as np
+import plotly.graph_objects as go
+
+from core.mesh_neighbors import surface_edges, surface_triangles
+
+
+class MeshGeometry:
+    """
+    Render buffers of one mesh, built once and shared by every 3D plot
+    (get it with mesh_geometry). Arrays use compact dtypes, which plotly
+    writes into the HTML as base64 typed arrays:
+        vertices   (N, 3) float32 node coordinates
+        triangles  (T, 3) int32 surface triangles (node positions)
+        owner      (T,) element position of each triangle
+        edges      (S, 2) int32 surface edges (node positions)
+    """
+
+    def __init__(self, vertices, triangles, owner, edges):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.triangles = triangles.astype(np.int32)
+        self.owner = owner
+        self.edges = edges.astype(np.int32)
+        self._edge_lines = None
+
+    @classmethod
+    def from_mesh(cls, mesh):
+        tris, owner = surface_triangles(mesh)
+        return cls(mesh.coords, tris, owner, surface_edges(mesh))
+
+    @property
+    def num_triangles(self):
+        return len(self.triangles)
+
+    @property
+    def edge_lines(self):
+        """x, y, z float32 line arrays of the surface edges, NaN-separated."""
+        if self._edge_lines is None:
+            self._edge_lines = edge_segments(self.vertices, self.edges)
+        return self._edge_lines
+
+
+def mesh_geometry(mesh):
+    """The mesh's MeshGeometry, built on first use and kept on the mesh."""
+    if getattr(mesh, "_geometry", None) is None:
+        mesh._geometry = MeshGeometry.from_mesh(mesh)
+    return mesh._geometry
+
+
+# ----------------------------------------------------------------
+# Level of detail
+# ----------------------------------------------------------------
+
+DEFAULT_TRIANGLE_BUDGET = 400_000
+# Share of the budget full-resolution triangles may take; the rest is
+# left for the clustered remainder
+KEEP_SHARE = 0.75
+# Share of the budget whose edges are drawn (highest priority first);
+# an edge costs about twice a triangle in the HTML
+EDGE_SHARE = 0.25
+
+
+def lod_geometry(geometry, priority, budget=DEFAULT_TRIANGLE_BUDGET, keep_share=KEEP_SHARE):
+    """
+    A MeshGeometry of at most about `budget` triangles. Elements with
+    (E,) `priority` > 0 (e.g. errors, HIGH risk) keep their triangles at
+    full resolution, highest priority first, up to `keep_share` of the
+    budget; all other triangles are decimated by vertex clustering on a
+    grid coarsened until they fit the rest. Vertices of kept triangles are
+    left out of the clustering, so the two parts join without cracks,
+    unless that can't fit the budget; if even a single cluster can't, the
+    highest-priority remaining triangles fill it. Edges are drawn for the
+    highest priority kept triangles, up to EDGE_SHARE of the budget.
+    """
+    if geometry.num_triangles <= budget:
+        return geometry
+
+    tri_priority = priority[geometry.owner]
+    order = np.argsort(-tri_priority, kind="stable")
+    cap = min(int(keep_share * budget), int((tri_priority > 0).sum()))
+    keep = np.zeros(geometry.num_triangles, dtype=bool)
+    keep[order[:cap]] = True
+
+    pinned = np.zeros(len(geometry.vertices), dtype=bool)
+    pinned[geometry.triangles[keep].ravel()] = True
+
+    rest = np.flatnonzero(~keep)
+    left = budget - cap
+
+    # Triangles with two pinned corners can't collapse; when kept elements
+    # are scattered so widely that those alone overflow, cluster everything
+    if (pinned[geometry.triangles[rest]].sum(axis=1) >= 2).sum() > left // 2:
+        pinned[:] = False
+
+    # A clustered surface has about two triangles per occupied cell, and
+    # occupied cells grow with the square of `cells`
+    cells = max(int(np.sqrt(left)), 1)
+    while True:
+        vertices, tris, tri_rows = cluster_vertices(
+            geometry.vertices, geometry.triangles[rest], pinned, cells
+        )
+        if len(tris) <= left or cells == 1:
+            break
+        cells = max(int(cells * min(0.9, 0.95 * np.sqrt(left / len(tris)))), 1)
+
+    # Budgets below what a single cell leaves (triangles held by pinned
+    # corners): keep the highest-priority ones
+    if len(tris) > left:
+        pick = np.sort(np.argsort(-tri_priority[rest[tri_rows]], kind="stable")[:left])
+        tris, tri_rows = tris[pick], tri_rows[pick]
+
+    triangles = np.concatenate([geometry.triangles[keep], tris])
+    owner = np.concatenate([geometry.owner[keep], geometry.owner[rest[tri_rows]]])
+    framed = geometry.triangles[order[:min(cap, int(EDGE_SHARE * budget))]]
+    edges = geometry.edges[_on_triangles(geometry.edges, framed, len(pinned))]
+    return _compact(vertices, triangles, owner, edges)
+
+
+def _on_triangles(edges, triangles, num_vertices):
+    """(S,) True for edges (n1 < n2) that are a side of one of `triangles`."""
+    a = triangles
+    b = np.roll(triangles, -1, axis=1)
+    sides = np.minimum(a, b).ravel().astype(np.int64) * num_vertices + np.maximum(a, b).ravel()
+    sides = np.sort(sides)
+    keys = edges[:, 0].astype(np.int64) * num_vertices + edges[:, 1]
+    at = np.minimum(np.searchsorted(sides, keys), max(len(sides) - 1, 0))
+    return (sides[at] == keys) if len(sides) else np.zeros(len(edges), dtype=bool)
+
+
+def cluster_vertices(vertices, triangles, pinned, cells):
+    """
+    Vertex clustering: unpinned vertices are merged per cell of a grid
+    with `cells` cells along the longest axis of their bounds, each
+    cluster placed at its members' mean. Returns (vertices: the input
+    vertices followed by the cluster centers, the surviving triangles
+    remapped, and their rows in `triangles`); triangles collapsed by the
+    merge or duplicated by it are dropped.
+    """
+    n = len(vertices)
+    free = np.zeros(n, dtype=bool)
+    free[triangles.ravel()] = True
+    free = np.flatnonzero(free & ~pinned)
+    remap = np.arange(n)
+    centers = np.zeros((0, 3), dtype=vertices.dtype)
+
+    if len(free):
+        pts = vertices[free].astype(np.float64)
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+        size = max(float((hi - lo).max()) / cells, 1e-12)
+        shape = np.floor((hi - lo) / size).astype(np.int64) + 1
+        ijk = np.minimum(((pts - lo) / size).astype(np.int64), shape - 1)
+        key = np.ravel_multi_index(ijk.T, shape)
+        order = np.argsort(key, kind="stable")
+        new = np.r_[True, key[order][1:] != key[order][:-1]]
+        inverse = np.empty(len(key), dtype=np.int64)
+        inverse[order] = np.cumsum(new) - 1
+        cluster = np.flatnonzero(new)
+
+        count = np.bincount(inverse, minlength=len(cluster))
+        centers = np.stack(
+            [np.bincount(inverse, pts[:, a], len(cluster)) / count for a in range(3)], axis=1
+        ).astype(vertices.dtype)
+        remap[free] = n + inverse
+
+    tris = remap[triangles]
+    ok = (tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 0] != tris[:, 2])
+    rows = np.flatnonzero(ok)
+    if len(rows) == 0:
+        return np.concatenate([vertices, centers]), tris[rows], rows
+
+    key = np.sort(tris[rows], axis=1)
+    order = np.lexsort(key.T[::-1])
+    key = key[order]
+    first = order[np.r_[True, (key[1:] != key[:-1]).any(axis=1)]]
+    rows = rows[np.sort(first)]
+    return np.concatenate([vertices, centers]), tris[rows], rows
+
+
+def _compact(vertices, triangles, owner, edges):
+    """MeshGeometry keeping only the vertices the triangles or edges use."""
+    used = np.zeros(len(vertices), dtype=bool)
+    used[triangles.ravel()] = True
+    used[edges.ravel()] = True
+    index = np.cumsum(used) - 1
+    return MeshGeometry(vertices[used], index[triangles], owner, index[edges])
+
+
+def edge_segments(coords, edges):
+    """x, y, z line arrays for (n1, n2) node pairs, NaN-separated."""
+    seg = np.full((len(edges), 3, 3), np.nan, dtype=coords.dtype)
+    seg[:, 0] = coords[edges[:, 0]]
+    seg[:, 1] = coords[edges[:, 1]]
+    return seg.reshape(-1, 3).T
+
+
+def category_codes(categories, names):
+    """
+    (E,) position in `names` of every entry of `categories`, via one sort
+    of the names; KeyError for a category not among them.
+    """
+    names = np.asarray(list(names))
+    order = np.argsort(names)
+    at = np.minimum(np.searchsorted(names[order], categories), max(len(names) - 1, 0))
+    code = order[at]
+    unknown = names[code] != categories
+    if unknown.any():
+        raise KeyError(np.asarray(categories)[unknown][0])
+    return code
+
+
+def stepped_colorscale(colors):
+    """Colorscale mapping [i, i + 1) to colors[i] when cmin=0, cmax=len(colors)."""
+    k = len(colors)
+    return [[pos, color] for i, color in enumerate(colors) for pos in (i / k, (i + 1) / k)]
+
+
+# ----------------------------------------------------------------
+# Traces
+# ----------------------------------------------------------------
+
+def surface_trace(geometry, categories, colors, **kwargs):
+    """
+    Mesh3d of the surface triangles, each colored by its element's entry
+    in (E,) `categories` via the `colors` dict (category -> color). The
+    colors go in as per-cell intensities on a stepped colorscale rather
+    than one color string per triangle.
+    """
+    names = list(colors)
+    code = category_codes(categories, names)
+    x, y, z = geometry.vertices.T
+    i, j, k = geometry.triangles.T
+
+    return go.Mesh3d(
+        x=x, y=y, z=z,
+        i=i, j=j, k=k,
+        intensity=(code[geometry.owner] + 0.5).astype(np.float32),
+        intensitymode="cell",
+        colorscale=stepped_colorscale([colors[n] for n in names]),
+        cmin=0,
+        cmax=len(names),
+        showscale=False,
+        **kwargs
+    )
+
+
+def edge_trace(geometry, **kwargs):
+    """Scatter3d of the surface edges."""
+    ex, ey, ez = geometry.edge_lines
+    return go.Scatter3d(x=ex, y=ey, z=ez, mode="lines", **kwargs)
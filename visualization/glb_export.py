@@ -0,0 +1,160 @@
+# ==========================================================
+# BINARY glTF (GLB) EXPORT OF RISK / ERROR COLORED MESHES
+# ==========================================================
+
+import json
+import struct
+
+import numpy as np
+from matplotlib.colors import to_rgba
+
+from ai.hybrid_risk import hybrid_categories
+from core.element_table import aligned_values
+from visualization.geometry import mesh_geometry
+from visualization.hybrid_risk_plot_3d import RISK_COLORS
+from visualization.mesh_error_debug_3d import ERROR_COLORS
+from visualization.mesh_plot import error_labels
+
+GLB_MAGIC = 0x46546C67      # "glTF"
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A     # "JSON"
+CHUNK_BIN = 0x004E4942      # "BIN\0"
+
+FLOAT = 5126
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+TRIANGLES = 4
+LINES = 1
+
+# glTF is Y-up, meshes are Z-up: -90 degrees about X
+Z_UP_ROTATION = [-0.7071068, 0.0, 0.0, 0.7071068]
+
+
+def export_risk_glb(mesh, hybrid_risks, output_glb, errors=None, edges=True):
+    """
+    Write the mesh's surface as a GLB file, faces colored by hybrid risk
+    category or, when `errors` (MeshErrors or a dict) is given, by each
+    element's first error code (lightgray for none). The buffers come
+    straight from the shared MeshGeometry; no Plotly figure is built.
+    """
+    geometry = mesh_geometry(mesh)
+
+    if errors is None:
+        categories = hybrid_categories(aligned_values(hybrid_risks, mesh.elem_ids))
+        colors = RISK_COLORS
+    else:
+        inverse, code_lists = error_labels(mesh, errors)
+        categories = np.array([codes[0] if codes else "OK" for codes in code_lists])[inverse]
+        colors = dict(ERROR_COLORS, OK="lightgray")
+
+    face_category = categories[geometry.owner]
+    groups = []
+    for name, color in colors.items():
+        tris = geometry.triangles[face_category == name]
+        if len(tris):
+            groups.append((name, color, tris))
+    # Codes missing from the color table (custom rules) are drawn red
+    other = ~np.isin(face_category, list(colors))
+    if other.any():
+        groups.append(("OTHER", "red", geometry.triangles[other]))
+
+    write_glb(
+        output_glb, geometry.vertices, groups,
+        edges=geometry.edges if edges else None
+    )
+    print(f"\nGLB mesh export saved to: {output_glb}")
+
+
+def write_glb(path, vertices, groups, edges=None, edge_color="black"):
+    """
+    Write one glTF mesh: (N, 3) `vertices` shared by one triangle
+    primitive per (name, color, (T, 3) triangles) group, plus a line
+    primitive for (S, 2) `edges`. Each primitive gets a flat material of
+    its color; without normals, viewers shade the faces flat.
+    """
+    buffer = bytearray()
+    views, accessors = [], []
+
+    def add(array, target, gltf_type, component, bounds=False):
+        data = np.ascontiguousarray(array).tobytes()
+        buffer.extend(b"\0" * (-len(buffer) % 4))
+        views.append({
+            "buffer": 0, "byteOffset": len(buffer),
+            "byteLength": len(data), "target": target
+        })
+        buffer.extend(data)
+        accessor = {
+            "bufferView": len(views) - 1, "componentType": component,
+            "count": len(array), "type": gltf_type
+        }
+        if bounds:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    # Only the vertices the primitives use (solids have interior nodes)
+    used = np.zeros(len(vertices), dtype=bool)
+    for _, _, tris in groups:
+        used[tris.ravel()] = True
+    if edges is not None:
+        used[edges.ravel()] = True
+    index = (np.cumsum(used) - 1).astype(np.uint32)
+
+    positions = np.asarray(vertices, dtype=np.float32)[used]
+    position = add(positions, ARRAY_BUFFER, "VEC3", FLOAT, bounds=len(positions) > 0)
+
+    parts = [(name, color, tris, TRIANGLES) for name, color, tris in groups]
+    if edges is not None and len(edges):
+        parts.append(("EDGES", edge_color, edges, LINES))
+
+    primitives, materials = [], []
+    for name, color, cells, mode in parts:
+        indices = add(index[cells].ravel(), ELEMENT_ARRAY_BUFFER, "SCALAR", UNSIGNED_INT)
+        materials.append({
+            "name": name,
+            "pbrMetallicRoughness": {
+                "baseColorFactor": linear_rgba(color),
+                "metallicFactor": 0.0,
+                "roughnessFactor": 0.8
+            },
+            "doubleSided": True
+        })
+        primitives.append({
+            "attributes": {"POSITION": position},
+            "indices": indices,
+            "material": len(materials) - 1,
+            "mode": mode
+        })
+
+    buffer.extend(b"\0" * (-len(buffer) % 4))
+    gltf = {
+        "asset": {"version": "2.0", "generator": "Mesh Project 2.0"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "rotation": Z_UP_ROTATION}],
+        "meshes": [{"primitives": primitives}],
+        "materials": materials,
+        "buffers": [{"byteLength": len(buffer)}],
+        "bufferViews": views,
+        "accessors": accessors
+    }
+
+    header = json.dumps(gltf, separators=(",", ":")).encode()
+    header += b" " * (-len(header) % 4)
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<3I", GLB_MAGIC, GLB_VERSION, 12 + 8 + len(header) + 8 + len(buffer)))
+        f.write(struct.pack("<2I", len(header), CHUNK_JSON))
+        f.write(header)
+        f.write(struct.pack("<2I", len(buffer), CHUNK_BIN))
+        f.write(buffer)
+
+
+def linear_rgba(color):
+    """glTF base color (linear RGBA) of a CSS color name or hex string."""
+    rgba = np.array(to_rgba(color))
+    rgb = rgba[:3]
+    rgba[:3] = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    return [round(float(c), 6) for c in rgba]
@@ -2,9 +2,15 @@
 # SIDE-BY-SIDE 3D COMPARISON WITH NODES + ERROR INDEX
 # ==========================================================
 
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from ai.hybrid_risk import hybrid_category
+from ai.hybrid_risk import hybrid_categories
+from core.element_table import aligned_values
+from quality.rules import error_count_array
+from visualization.geometry import (
+    DEFAULT_TRIANGLE_BUDGET, edge_trace, lod_geometry, mesh_geometry, surface_trace
+)
 
 
 RISK_COLORS = {
@@ -15,54 +21,31 @@ RISK_COLORS = {
 
 
 def risk_summary(hybrid_risks):
-    summary = {"LOW": 0, "MEDIUM": 0, "HIGH": 0}
-    for score in hybrid_risks.values():
-        summary[hybrid_category(score)] += 1
-    return summary
-
-
-def build_mesh_traces(mesh, hybrid_risks, show_nodes=True):
-    x, y, z = [], [], []
-    i, j, k = [], [], []
-    face_colors = []
-
-    node_index = {}
-    idx = 0
-
-    # Register nodes
-    for nid, node in mesh.nodes.items():
-        node_index[nid] = idx
-        x.append(node.x)
-        y.append(node.y)
-        z.append(node.z)
-        idx += 1
-
-    # Build faces
-    for elem_id, element in mesh.elements.items():
-        ids = element.node_ids
-        color = RISK_COLORS[hybrid_category(hybrid_risks.get(elem_id, 0.0))]
-
-        if len(ids) == 3:
-            i.append(node_index[ids[0]])
-            j.append(node_index[ids[1]])
-            k.append(node_index[ids[2]])
-            face_colors.append(color)
-
-        elif len(ids) == 4:
-            i.append(node_index[ids[0]])
-            j.append(node_index[ids[1]])
-            k.append(node_index[ids[2]])
-            face_colors.append(color)
-
-            i.append(node_index[ids[0]])
-            j.append(node_index[ids[2]])
-            k.append(node_index[ids[3]])
-            face_colors.append(color)
-
-    surface = go.Mesh3d(
-        x=x, y=y, z=z,
-        i=i, j=j, k=k,
-        facecolor=face_colors,
+    categories = hybrid_categories(list(hybrid_risks.values()))
+    return {name: int((categories == name).sum()) for name in ("LOW", "MEDIUM", "HIGH")}
+
+
+def build_mesh_traces(mesh, hybrid_risks, show_nodes=True, errors=None,
+                      triangle_budget=DEFAULT_TRIANGLE_BUDGET):
+    """
+    Surface, wireframe and node traces of one mesh colored by hybrid risk.
+    Surfaces over `triangle_budget` triangles (None: no limit) are drawn
+    at a level of detail that keeps HIGH-risk and error elements (given
+    MeshErrors or a dict) at full resolution; see lod_geometry.
+    """
+    geometry = full = mesh_geometry(mesh)
+    scores = aligned_values(hybrid_risks, mesh.elem_ids)
+    categories = hybrid_categories(scores)
+
+    if triangle_budget is not None and geometry.num_triangles > triangle_budget:
+        important = categories == "HIGH"
+        if errors is not None:
+            important |= error_count_array(errors, mesh.elem_ids) > 0
+        geometry = lod_geometry(geometry, np.where(important, 1.0 + scores, 0.0), triangle_budget)
+
+    # Faces: shells as-is, solids by their exterior faces
+    surface = surface_trace(
+        geometry, categories, RISK_COLORS,
         opacity=0.6,
         flatshading=True,
         lighting=dict(ambient=0.5, diffuse=0.8)
@@ -71,25 +54,18 @@ def build_mesh_traces(mesh, hybrid_risks, show_nodes=True):
     traces = [surface]
 
     # Wireframe
-    ex, ey, ez = [], [], []
-    for element in mesh.elements.values():
-        ids = element.node_ids
-        for t in range(len(ids)):
-            p1 = mesh.nodes[ids[t]]
-            p2 = mesh.nodes[ids[(t + 1) % len(ids)]]
-            ex += [p1.x, p2.x, None]
-            ey += [p1.y, p2.y, None]
-            ez += [p1.z, p2.z, None]
-
-    traces.append(go.Scatter3d(
-        x=ex, y=ey, z=ez,
-        mode="lines",
+    traces.append(edge_trace(
+        geometry,
         line=dict(color="black", width=1),
         name="Edges"
     ))
 
-    # Nodes
+    # Nodes (at a reduced level of detail, the full-resolution ones)
     if show_nodes:
+        vertices = geometry.vertices
+        if geometry is not full:
+            vertices = vertices[np.unique(geometry.edges)]
+        x, y, z = vertices.T
         traces.append(go.Scatter3d(
             x=x, y=y, z=z,
             mode="markers",
@@ -100,7 +76,9 @@ def build_mesh_traces(mesh, hybrid_risks, show_nodes=True):
     return traces
 
 
-def plot_side_by_side(first_mesh, first_risks, final_mesh, final_risks, output_html):
+def plot_side_by_side(first_mesh, first_risks, final_mesh, final_risks, output_html,
+                      first_errors=None, final_errors=None,
+                      triangle_budget=DEFAULT_TRIANGLE_BUDGET):
     fig = make_subplots(
         rows=1, cols=2,
         specs=[[{"type": "scene"}, {"type": "scene"}]],
@@ -108,11 +86,13 @@ def plot_side_by_side(first_mesh, first_risks, final_mesh, final_risks, output_h
     )
 
     # First mesh
-    for trace in build_mesh_traces(first_mesh, first_risks):
+    for trace in build_mesh_traces(first_mesh, first_risks, errors=first_errors,
+                                   triangle_budget=triangle_budget):
         fig.add_trace(trace, row=1, col=1)
 
     # Final mesh
-    for trace in build_mesh_traces(final_mesh, final_risks):
+    for trace in build_mesh_traces(final_mesh, final_risks, errors=final_errors,
+                                   triangle_budget=triangle_budget):
         fig.add_trace(trace, row=1, col=2)
 
     # Risk summaries
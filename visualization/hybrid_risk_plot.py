@@ -2,8 +2,12 @@
 # HYBRID RISK VISUALIZATION (FINAL)
 # ==========================================
 
+import numpy as np
 import plotly.graph_objects as go
-from ai.hybrid_risk import hybrid_category
+from ai.hybrid_risk import hybrid_categories
+from core.element_table import aligned_values
+from visualization.geometry import category_codes
+from visualization.mesh_plot import hover_trace, polygon_traces
 
 
 RISK_COLORS = {
@@ -16,35 +20,22 @@ RISK_COLORS = {
 def plot_hybrid_risk(mesh, hybrid_risks, output_html="mesh_hybrid_risk.html"):
     fig = go.Figure()
 
-    for elem_id, element in mesh.elements.items():
-        coords = [mesh.nodes[nid].coords() for nid in element.node_ids]
-
-        # close polygon
-        xs = [c[0] for c in coords] + [coords[0][0]]
-        ys = [c[1] for c in coords] + [coords[0][1]]
-
-        score = hybrid_risks.get(elem_id, 0.0)
-        category = hybrid_category(score)
-        color = RISK_COLORS[category]
-
-        hover_text = (
-            f"<b>Element ID:</b> {elem_id}<br>"
-            f"<b>Hybrid Risk Score:</b> {score:.2f}<br>"
-            f"<b>Risk Level:</b> {category}"
-        )
-
-        fig.add_trace(go.Scatter(
-            x=xs,
-            y=ys,
-            fill="toself",
-            mode="lines",
-            line=dict(color=color),
-            fillcolor=color,
-            opacity=0.75,
-            hoverinfo="text",
-            text=hover_text,
-            showlegend=False
-        ))
+    scores = aligned_values(hybrid_risks, mesh.elem_ids)
+    categories = hybrid_categories(scores)
+    colors = np.array(list(RISK_COLORS.values()))[category_codes(categories, RISK_COLORS)]
+
+    # one closed, filled trace per risk level
+    for trace in polygon_traces(mesh, colors, opacity=0.75):
+        fig.add_trace(trace)
+
+    fig.add_trace(hover_trace(
+        mesh,
+        np.stack([mesh.elem_ids, scores], axis=1),
+        "<b>Element ID:</b> %{customdata[0]}<br>"
+        "<b>Hybrid Risk Score:</b> %{customdata[1]:.2f}<br>"
+        "<b>Risk Level:</b> %{text}",
+        text=categories
+    ))
 
     fig.update_layout(
         title="Hybrid Mesh Quality Risk Visualization",
@@ -4,7 +4,9 @@
 # ==========================================
 
 import plotly.graph_objects as go
-from ai.hybrid_risk import hybrid_category
+from ai.hybrid_risk import hybrid_categories
+from core.element_table import aligned_values
+from visualization.geometry import edge_trace, mesh_geometry, surface_trace
 
 RISK_COLORS = {
     "LOW": "green",
@@ -14,60 +16,20 @@ RISK_COLORS = {
 
 
 def plot_hybrid_risk_3d(mesh, hybrid_risks, output_html):
-    x, y, z = [], [], []
-    i, j, k = [], [], []
-    face_colors = []
-
-    node_index = {}
-    idx = 0
-
-    # ----------------------------
-    # 1. Register nodes
-    # ----------------------------
-    for nid, node in mesh.nodes.items():
-        node_index[nid] = idx
-        x.append(node.x)
-        y.append(node.y)
-        z.append(node.z)
-        idx += 1
+    geometry = mesh_geometry(mesh)
 
     # ----------------------------
-    # 2. Build triangular faces
+    # 1. Triangular faces
+    #    (shells as-is, solids by their exterior faces,
+    #     quads split into 2 triangles)
     # ----------------------------
-    for elem_id, element in mesh.elements.items():
-        ids = element.node_ids
-        color = RISK_COLORS[hybrid_category(hybrid_risks.get(elem_id, 0.0))]
-
-        # Triangle
-        if len(ids) == 3:
-            i.append(node_index[ids[0]])
-            j.append(node_index[ids[1]])
-            k.append(node_index[ids[2]])
-            face_colors.append(color)
-
-        # Quad → split into 2 triangles
-        elif len(ids) == 4:
-            i.append(node_index[ids[0]])
-            j.append(node_index[ids[1]])
-            k.append(node_index[ids[2]])
-            face_colors.append(color)
-
-            i.append(node_index[ids[0]])
-            j.append(node_index[ids[2]])
-            k.append(node_index[ids[3]])
-            face_colors.append(color)
+    categories = hybrid_categories(aligned_values(hybrid_risks, mesh.elem_ids))
 
     # ----------------------------
-    # 3. Surface (faces)
+    # 2. Surface (faces)
     # ----------------------------
-    mesh_surface = go.Mesh3d(
-        x=x,
-        y=y,
-        z=z,
-        i=i,
-        j=j,
-        k=k,
-        facecolor=face_colors,
+    mesh_surface = surface_trace(
+        geometry, categories, RISK_COLORS,
         opacity=0.65,   # IMPORTANT: see through
         lighting=dict(
             ambient=0.5,
@@ -79,36 +41,16 @@ def plot_hybrid_risk_3d(mesh, hybrid_risks, output_html):
     )
 
     # ----------------------------
-    # 4. Wireframe (edges)
+    # 3. Wireframe (edges)
     # ----------------------------
-    edge_x, edge_y, edge_z = [], [], []
-
-    for element in mesh.elements.values():
-        ids = element.node_ids
-        n = len(ids)
-
-        for t in range(n):
-            n1 = ids[t]
-            n2 = ids[(t + 1) % n]
-
-            p1 = mesh.nodes[n1]
-            p2 = mesh.nodes[n2]
-
-            edge_x += [p1.x, p2.x, None]
-            edge_y += [p1.y, p2.y, None]
-            edge_z += [p1.z, p2.z, None]
-
-    mesh_edges = go.Scatter3d(
-        x=edge_x,
-        y=edge_y,
-        z=edge_z,
-        mode="lines",
+    mesh_edges = edge_trace(
+        geometry,
         line=dict(color="black", width=1),
         name="Mesh Edges"
     )
 
     # ----------------------------
-    # 5. Final figure
+    # 4. Final figure
     # ----------------------------
     fig = go.Figure(data=[mesh_surface, mesh_edges])
 
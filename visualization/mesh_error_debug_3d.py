@@ -2,83 +2,149 @@
 # CAE-STYLE 3D MESH ERROR DEBUG VISUALIZATION
 # =====================================================
 
+import numpy as np
 import plotly.graph_objects as go
 from collections import Counter
 
+from core.mesh_neighbors import EDGE, build_adjacency, element_edges
+from core.spatial_index import spatial_index
+from visualization.geometry import edge_segments, stepped_colorscale
+from visualization.mesh_plot import error_labels
+
 ERROR_COLORS = {
     "BAD_ASPECT_RATIO": "red",
     "BAD_TRANSITION": "orange",
     "SMALL_AREA": "purple",
     "MISSING_NEIGHBOR": "black",
+    "COINCIDENT_NODES": "magenta",
+    "DUPLICATE_ELEMENT": "brown",
+    "NON_MANIFOLD_EDGE": "darkred",
+    "INCONSISTENT_ORIENTATION": "blue",
+    "DISCONNECTED_COMPONENT": "gray",
     "OK": "green"
 }
 
+# Centroid marker symbols for errors that are easy to miss in the
+# wireframe (overlapping elements draw on top of each other); other errors
+# get circles
+MARKER_SYMBOLS = {
+    "MISSING_NEIGHBOR": "x",
+    "COINCIDENT_NODES": "diamond",
+    "DUPLICATE_ELEMENT": "square",
+}
+
 
-def element_centroid(mesh, element):
-    xs, ys, zs = [], [], []
-    for nid in element.node_ids:
-        n = mesh.nodes[nid]
-        xs.append(n.x)
-        ys.append(n.y)
-        zs.append(n.z)
-    return sum(xs)/len(xs), sum(ys)/len(ys), sum(zs)/len(zs)
+# Meshes larger than this are drawn errors-only by default
+ERRORS_ONLY_ABOVE = 50_000
+CONTEXT_RINGS = 1
 
 
-def plot_mesh_errors_3d(mesh, errors, output_html="mesh_error_debug.html"):
+def plot_mesh_errors_3d(mesh, errors, output_html="mesh_error_debug.html",
+                        errors_only=None, context_rings=CONTEXT_RINGS,
+                        neighbors=None, show_nodes=True):
+    """
+    Element edges colored by each element's first error, one line trace
+    per error code, plus one marker trace on the error elements' centroids.
+
+    With errors_only (default: for meshes over ERRORS_ONLY_ABOVE elements)
+    only error elements and `context_rings` rings of their neighbors are
+    drawn; `neighbors` (an aligned ElementAdjacency) is built if not given.
+    The nodes of the drawn elements start hidden (toggle in the legend).
+    """
     fig = go.Figure()
-    error_counter = Counter()
-
-    # ---------- Draw faces ----------
-    for elem_id, element in mesh.elements.items():
-        coords = [mesh.nodes[nid] for nid in element.node_ids]
-        xs = [n.x for n in coords] + [coords[0].x]
-        ys = [n.y for n in coords] + [coords[0].y]
-        zs = [n.z for n in coords] + [coords[0].z]
-
-        if elem_id in errors:
-            err_type = errors[elem_id][0]
-            color = ERROR_COLORS[err_type]
-            error_counter[err_type] += 1
-        else:
-            color = ERROR_COLORS["OK"]
 
+    inverse, code_lists = error_labels(mesh, errors)
+    first = np.array([codes[0] if codes else "OK" for codes in code_lists])[inverse]
+    has_error = first != "OK"
+    error_counter = Counter(first[has_error].tolist())
+
+    if errors_only is None:
+        errors_only = mesh.num_elements > ERRORS_ONLY_ABOVE
+    shown = has_error.copy()
+    if errors_only:
+        if neighbors is None or not np.array_equal(neighbors.elem_ids, mesh.elem_ids):
+            neighbors = build_adjacency(mesh, EDGE)
+        A = neighbors.to_sparse()
+        for _ in range(context_rings):
+            shown |= A @ shown.astype(np.float64) > 0
+    else:
+        shown[:] = True
+
+    # ---------- Element edges, one trace per error code ----------
+    for code in ["OK"] + sorted(error_counter):
+        rows = np.flatnonzero(shown & (first == code))
+        if len(rows) == 0:
+            continue
+        edges = element_edges(mesh, rows)
+        ex, ey, ez = edge_segments(mesh.coords, edges).astype(np.float32)
         fig.add_trace(go.Scatter3d(
-            x=xs, y=ys, z=zs,
+            x=ex, y=ey, z=ez,
             mode="lines",
-            line=dict(color=color, width=4),
+            line=dict(color=ERROR_COLORS.get(code, "red"), width=4),
             opacity=0.9,
-            showlegend=False
+            name=code,
+            hoverinfo="skip"
         ))
 
-    # ---------- Missing neighbor markers ----------
-    for elem_id, err_list in errors.items():
-        if "MISSING_NEIGHBOR" in err_list:
-            cx, cy, cz = element_centroid(mesh, mesh.elements[elem_id])
+    # ---------- Centroid markers ----------
+    # Colors go in as numbers on a stepped colorscale: per-point color
+    # strings are validated one by one and take minutes on large meshes
+    marked = np.flatnonzero(has_error)
+    if len(marked):
+        legend = sorted(error_counter)
+        color = np.searchsorted(legend, first[marked]) + 0.5
+        text = np.array([", ".join(c) for c in code_lists], dtype=object)[inverse[marked]]
+        centroids = spatial_index(mesh).centroids.astype(np.float32)
+        cx, cy, cz = centroids[marked].T
+        fig.add_trace(go.Scatter3d(
+            x=cx, y=cy, z=cz,
+            mode="markers",
+            marker=dict(
+                size=3,
+                color=color,
+                colorscale=stepped_colorscale([ERROR_COLORS.get(c, "red") for c in legend]),
+                cmin=0,
+                cmax=len(legend)
+            ),
+            customdata=mesh.elem_ids[marked],
+            text=text,
+            hovertemplate="Element %{customdata}<br>%{text}<extra></extra>",
+            name="Error elements"
+        ))
+
+        # Larger symbols for the errors MARKER_SYMBOLS singles out
+        for err, symbol in MARKER_SYMBOLS.items():
+            has = np.array([err in codes for codes in code_lists])[inverse]
+            if not has.any():
+                continue
+            mx, my, mz = centroids[has].T
             fig.add_trace(go.Scatter3d(
-                x=[cx], y=[cy], z=[cz],
+                x=mx, y=my, z=mz,
                 mode="markers",
-                marker=dict(size=10, color="black", symbol="x"),
-                showlegend=False
+                marker=dict(size=8, color=ERROR_COLORS.get(err, "red"), symbol=symbol),
+                hoverinfo="skip",
+                name=err
             ))
 
     # ---------- Nodes ----------
-    nx, ny, nz = [], [], []
-    for node in mesh.nodes.values():
-        nx.append(node.x)
-        ny.append(node.y)
-        nz.append(node.z)
-
-    fig.add_trace(go.Scatter3d(
-        x=nx, y=ny, z=nz,
-        mode="markers",
-        marker=dict(size=6, color="blue", opacity=0.8),
-        name="Nodes"
-    ))
+    if show_nodes:
+        used = np.zeros(mesh.num_nodes, dtype=bool)
+        for block in mesh.blocks.values():
+            used[block.conn[shown[block.elem_index]].ravel()] = True
+        nx, ny, nz = mesh.coords[used].T
+
+        fig.add_trace(go.Scatter3d(
+            x=nx, y=ny, z=nz,
+            mode="markers",
+            marker=dict(size=2, color="blue", opacity=0.8),
+            name="Nodes",
+            visible="legendonly"
+        ))
 
     # ---------- Error index ----------
     index_text = "<b>Mesh Error Index</b><br>"
     for err, cnt in error_counter.items():
-        index_text += f"<span style='color:{ERROR_COLORS[err]}'>{err}: {cnt}</span><br>"
+        index_text += f"<span style='color:{ERROR_COLORS.get(err, 'red')}'>{err}: {cnt}</span><br>"
 
     fig.update_layout(
         title="CAE-Style Mesh Error Visualization",
@@ -1,44 +1,42 @@
 # visualization/mesh_plot.py
 
+import numpy as np
 import plotly.graph_objects as go
 
+from core.element_types import element_type
+from core.spatial_index import spatial_index
+
 
 ERROR_COLORS = {
     "BAD_ASPECT_RATIO": "red",
     "BAD_TRANSITION": "orange",
     "SMALL_AREA": "purple",
-    "MISSING_NEIGHBOR": "black"
+    "MISSING_NEIGHBOR": "black",
+    "COINCIDENT_NODES": "magenta",
+    "DUPLICATE_ELEMENT": "brown",
+    "NON_MANIFOLD_EDGE": "darkred",
+    "INCONSISTENT_ORIENTATION": "blue",
+    "DISCONNECTED_COMPONENT": "gray"
 }
 
 
 def plot_mesh(mesh, errors, output_html="mesh_quality.html"):
     fig = go.Figure()
 
-    for elem_id, element in mesh.elements.items():
-        coords = [mesh.nodes[nid].coords() for nid in element.node_ids]
-        xs = [c[0] for c in coords] + [coords[0][0]]
-        ys = [c[1] for c in coords] + [coords[0][1]]
-
-        if elem_id in errors:
-            err_type = errors[elem_id][0]
-            color = ERROR_COLORS.get(err_type, "red")
-            hover = f"Element {elem_id}<br>Errors: {errors[elem_id]}"
-        else:
-            color = "lightgray"
-            hover = f"Element {elem_id}<br>Status: OK"
-
-        fig.add_trace(go.Scatter(
-            x=xs,
-            y=ys,
-            fill="toself",
-            mode="lines",
-            line=dict(color=color),
-            fillcolor=color,
-            opacity=0.7,
-            hoverinfo="text",
-            text=hover,
-            showlegend=False
-        ))
+    inverse, code_lists = error_labels(mesh, errors)
+    colors = np.array([
+        ERROR_COLORS.get(codes[0], "red") if codes else "lightgray"
+        for codes in code_lists
+    ])[inverse]
+    status = np.array([
+        f"Errors: {codes}" if codes else "Status: OK" for codes in code_lists
+    ], dtype=object)[inverse]
+
+    for trace in polygon_traces(mesh, colors, opacity=0.7):
+        fig.add_trace(trace)
+    fig.add_trace(hover_trace(
+        mesh, mesh.elem_ids, "Element %{customdata}<br>%{text}", text=status
+    ))
 
     fig.update_layout(
         title="Mesh Quality Visualization",
@@ -49,3 +47,101 @@ def plot_mesh(mesh, errors, output_html="mesh_quality.html"):
 
     fig.write_html(output_html)
     print(f"Mesh visualization saved to {output_html}")
+
+
+# ----------------------------------------------------------------
+# Merged 2D traces: one filled trace per color, hover on centroids
+# ----------------------------------------------------------------
+
+def error_labels(mesh, errors):
+    """
+    (E,) index into a list of distinct code lists, and that list: every
+    element's violated codes in rule order ([] for none). MeshErrors are
+    decoded once per distinct mask; plain dicts are looked up per element.
+    """
+    if hasattr(errors, "mask") and np.array_equal(errors.elem_ids, mesh.elem_ids):
+        masks, inverse = np.unique(errors.mask, return_inverse=True)
+        codes = [
+            [code for bit, code in enumerate(errors.codes) if int(m) >> bit & 1]
+            for m in masks.tolist()
+        ]
+        return inverse.ravel(), codes
+
+    codes, index = [[]], {(): 0}
+    inverse = np.zeros(mesh.num_elements, dtype=np.int64)
+    for elem_id, err_list in errors.items():
+        pos = mesh.elem_index.get(elem_id)
+        if pos is None:
+            continue
+        key = tuple(err_list)
+        if key not in index:
+            index[key] = len(codes)
+            codes.append(list(err_list))
+        inverse[pos] = index[key]
+    return inverse, codes
+
+
+def element_outlines(mesh, positions):
+    """
+    x, y arrays tracing the closed corner polygon of every element at
+    `positions`, each polygon followed by a NaN gap. float32 is plenty on
+    screen and halves the HTML.
+    """
+    xs, ys = [], []
+    selected = np.zeros(mesh.num_elements, dtype=bool)
+    selected[positions] = True
+
+    for block in mesh.blocks.values():
+        rows = np.flatnonzero(selected[block.elem_index])
+        if len(rows) == 0:
+            continue
+        corners = element_type(block.elem_type).corners or block.nodes_per_element
+        conn = block.conn[rows, :corners]
+        ring = np.concatenate([conn, conn[:, :1]], axis=1)
+
+        pts = np.full((len(rows), corners + 2, 2), np.nan, dtype=np.float32)
+        pts[:, :-1] = mesh.coords[ring, :2]
+        xs.append(pts[..., 0].ravel())
+        ys.append(pts[..., 1].ravel())
+
+    if not xs:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def polygon_traces(mesh, colors, opacity=0.75):
+    """One filled, NaN-separated Scatter per distinct value of (E,) `colors`."""
+    traces = []
+    for color in np.unique(colors).tolist():
+        x, y = element_outlines(mesh, np.flatnonzero(colors == color))
+        traces.append(go.Scatter(
+            x=x,
+            y=y,
+            fill="toself",
+            mode="lines",
+            line=dict(color=color),
+            fillcolor=color,
+            opacity=opacity,
+            hoverinfo="skip",
+            showlegend=False
+        ))
+    return traces
+
+
+def hover_trace(mesh, customdata, hovertemplate, text=None):
+    """
+    Invisible centroid markers carrying the per-element hover data.
+    Numeric `customdata` arrays are written to the HTML as typed arrays;
+    per-element strings go in `text`.
+    """
+    centroids = spatial_index(mesh).centroids.astype(np.float32)
+    return go.Scatter(
+        x=centroids[:, 0],
+        y=centroids[:, 1],
+        mode="markers",
+        marker=dict(size=8, opacity=0),
+        customdata=customdata,
+        text=text,
+        hovertemplate=hovertemplate + "<extra></extra>",
+        showlegend=False
+    )
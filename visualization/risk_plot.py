@@ -1,7 +1,11 @@
 # visualization/risk_plot.py
 
+import numpy as np
 import plotly.graph_objects as go
-from ai.risk_model import risk_category
+from ai.risk_model import risk_categories
+from core.element_table import aligned_values
+from visualization.geometry import category_codes
+from visualization.mesh_plot import hover_trace, polygon_traces
 
 RISK_COLORS = {
     "LOW": "green",
@@ -13,33 +17,21 @@ RISK_COLORS = {
 def plot_risk_zones(mesh, risks, output_html="mesh_risk_zones.html"):
     fig = go.Figure()
 
-    for elem_id, element in mesh.elements.items():
-        coords = [mesh.nodes[nid].coords() for nid in element.node_ids]
-        xs = [c[0] for c in coords] + [coords[0][0]]
-        ys = [c[1] for c in coords] + [coords[0][1]]
-
-        score = risks.get(elem_id, 0.0)
-        category = risk_category(score)
-        color = RISK_COLORS[category]
-
-        hover = (
-            f"Element ID: {elem_id}<br>"
-            f"Risk Score: {score:.2f}<br>"
-            f"Risk Level: {category}"
-        )
-
-        fig.add_trace(go.Scatter(
-            x=xs,
-            y=ys,
-            fill="toself",
-            mode="lines",
-            line=dict(color=color),
-            fillcolor=color,
-            opacity=0.75,
-            hoverinfo="text",
-            text=hover,
-            showlegend=False
-        ))
+    scores = aligned_values(risks, mesh.elem_ids)
+    categories = risk_categories(scores)
+    colors = np.array(list(RISK_COLORS.values()))[category_codes(categories, RISK_COLORS)]
+
+    for trace in polygon_traces(mesh, colors, opacity=0.75):
+        fig.add_trace(trace)
+
+    fig.add_trace(hover_trace(
+        mesh,
+        np.stack([mesh.elem_ids, scores], axis=1),
+        "Element ID: %{customdata[0]}<br>"
+        "Risk Score: %{customdata[1]:.2f}<br>"
+        "Risk Level: %{text}",
+        text=categories
+    ))
 
     fig.update_layout(
         title="Mesh Quality Risk Zones",
@@ -50,4 +42,3 @@ def plot_risk_zones(mesh, risks, output_html="mesh_risk_zones.html"):
 
     fig.write_html(output_html)
     print(f"Risk zone visualization saved to {output_html}")
-